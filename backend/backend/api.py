@@ -3,8 +3,9 @@ from users.api import router as users_router
 from projects.api import router as projects_router
 from tasks.api import router as tasks_router
 from users.auth import AuthBearer
+from .renderers import FastJSONRenderer
 
-api = NinjaAPI()
+api = NinjaAPI(renderer=FastJSONRenderer())
 
 # Add routers
 api.add_router("/auth/", users_router)
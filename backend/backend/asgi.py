@@ -2,6 +2,8 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Long-lived streams such as the task event stream (/api/tasks/events) need
+the app to be served over ASGI, where an idle connection holds no thread.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
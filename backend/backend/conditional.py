@@ -0,0 +1,67 @@
+"""
+Conditional GET support for API handlers
+
+Read endpoints compute a cheap version of the data they would return (for
+example max(updated_at) and the row count of a list) before loading and
+serializing it. The version becomes the response's ETag, and a request
+whose If-None-Match already carries it gets an empty 304 Not Modified.
+"""
+import hashlib
+from typing import Optional
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+
+def make_etag(request, *parts) -> str:
+    """
+    Build a weak ETag for the current user, URL and data version
+    
+    Args:
+        request: Authenticated API request
+        parts: Values that change whenever the response body would
+    
+    Returns:
+        Quoted weak ETag
+    """
+    user = getattr(request, 'auth', None)
+    key = repr((getattr(user, 'pk', None), request.get_full_path(), parts))
+    return 'W/' + quote_etag(hashlib.sha1(key.encode()).hexdigest())
+
+def etag_matches(etag: str, header: str) -> bool:
+    """Weak comparison of an ETag against an If-None-Match header"""
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    if '*' in candidates:
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(candidate.removeprefix('W/') == opaque for candidate in candidates)
+
+def not_modified(request, response: HttpResponse, *parts) -> Optional[HttpResponse]:
+    """
+    Validate a request against the version of its response
+    
+    The validators are set on the handler's temporal response, so a full
+    response carries them too. Browsers keep such responses in their
+    private cache and revalidate them on every request.
+    
+    Args:
+        request: Authenticated API request
+        response: Temporal response Django Ninja passes to the handler
+        parts: Values that change whenever the response body would
+    
+    Returns:
+        A 304 response if the client's copy is current, otherwise None
+    """
+    etag = make_etag(request, *parts)
+    response['ETag'] = etag
+    patch_vary_headers(response, ['Authorization'])
+    patch_cache_control(response, private=True, no_cache=True)
+    
+    if not etag_matches(etag, request.headers.get('If-None-Match', '')):
+        return None
+    
+    unchanged = HttpResponseNotModified()
+    for header in ('ETag', 'Vary', 'Cache-Control'):
+        unchanged[header] = response[header]
+    return unchanged
@@ -0,0 +1,278 @@
+"""
+Task change events pushed to connected clients
+
+Writes publish small events once their transaction commits:
+
+    {"type": "created" | "updated" | "deleted",
+     "tasks": [[id, project_id, assigned_to_id, created_by_id], ...] or None,
+     "projects": [ids], "users": [ids]}
+
+`tasks` holds the scope of each changed task before and after the change,
+and `projects` and `users` all the ids in those scopes; `tasks` is None
+when a queryset update changed tasks without listing them. Subscribers
+only receive the ids of the tasks they can see. Membership changes
+publish {"type": "access", "projects": [id], "users": [id], "granted":
+bool}.
+
+Events go through a broker (TASK_EVENTS_BROKER). LocalBroker hands them
+straight to this process's EventHub; RedisBroker publishes them on a Redis
+channel that every worker listens to, so all workers see every event. The
+hub runs in the worker's event loop and routes each event to the
+subscriptions of users who can see the tasks, indexed by project and user
+so an event only touches the connections it concerns.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Events a subscription buffers before it is told to resync
+SUBSCRIPTION_QUEUE_SIZE = 256
+
+# Seconds between keepalive comments on an idle event stream
+HEARTBEAT_INTERVAL = 15
+
+class Subscription:
+    """A connected client and the events waiting to be sent to it"""
+
+    def __init__(self, user_id, is_admin, project_ids):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.project_ids = set(project_ids)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+        self.overflowed = False
+
+    def can_see(self, project_id, assigned_to_id, created_by_id) -> bool:
+        """Whether the subscriber can see a task with this scope"""
+        return (
+            self.is_admin or project_id in self.project_ids
+            or self.user_id in (assigned_to_id, created_by_id)
+        )
+
+    def payload(self, event):
+        """The part of an event this subscriber may see"""
+        payload = {key: value for key, value in event.items() if key not in ('projects', 'users')}
+        if self.is_admin or event['type'] == 'access':
+            payload['projects'] = event['projects']
+        else:
+            payload['projects'] = sorted(set(event['projects']) & self.project_ids)
+        if event.get('tasks') is not None:
+            payload['tasks'] = sorted({task_id for task_id, *scope in event['tasks'] if self.can_see(*scope)})
+        return payload
+
+    def put(self, event):
+        """Queue an event; a client that falls behind has to resync"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(self.payload(event))
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait({'type': 'resync'})
+
+class EventHub:
+    """In-process fan-out of events to subscriptions"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_project = defaultdict(set)
+        self._by_user = defaultdict(set)
+        self._admins = set()
+
+    def subscribe(self, user_id, is_admin, project_ids) -> Subscription:
+        """Register a subscription; call from the event loop serving it"""
+        subscription = Subscription(user_id, is_admin, project_ids)
+        with self._lock:
+            self._index(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._unindex(subscription)
+
+    def count(self) -> int:
+        """Number of connected subscriptions"""
+        with self._lock:
+            return len({sub for subs in self._by_user.values() for sub in subs})
+
+    def dispatch(self, event: dict):
+        """
+        Route an event to the subscriptions that may see it
+
+        Safe to call from any thread; each subscription receives the event
+        on its own event loop.
+        """
+        with self._lock:
+            if event['type'] == 'access':
+                self._apply_access(event)
+            targets = set(self._admins)
+            for project_id in event['projects']:
+                targets |= self._by_project.get(project_id, set())
+            for user_id in event['users']:
+                targets |= self._by_user.get(user_id, set())
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # The subscription's event loop has closed
+                self.unsubscribe(subscription)
+
+    def _apply_access(self, event):
+        """Keep the project sets of affected subscriptions current"""
+        for user_id in event['users']:
+            for subscription in list(self._by_user.get(user_id, ())):
+                self._unindex(subscription)
+                for project_id in event['projects']:
+                    if event['granted']:
+                        subscription.project_ids.add(project_id)
+                    else:
+                        subscription.project_ids.discard(project_id)
+                self._index(subscription)
+
+    def _index(self, subscription):
+        self._by_user[subscription.user_id].add(subscription)
+        if subscription.is_admin:
+            self._admins.add(subscription)
+        for project_id in subscription.project_ids:
+            self._by_project[project_id].add(subscription)
+
+    def _unindex(self, subscription):
+        for index, key in [
+            (self._by_user, subscription.user_id),
+            *((self._by_project, project_id) for project_id in subscription.project_ids),
+        ]:
+            subscribers = index.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del index[key]
+        self._admins.discard(subscription)
+
+hub = EventHub()
+
+class LocalBroker:
+    """Deliver events to subscriptions of the current process only"""
+
+    def publish(self, event: dict):
+        hub.dispatch(event)
+
+    def start(self):
+        """Nothing to listen to"""
+
+class RedisBroker:
+    """
+    Share events between worker processes through Redis pub/sub
+
+    Needs the `redis` package and REDIS_URL. Each process listens on the
+    channel from its event loop and dispatches what it receives to its hub.
+    """
+
+    channel = 'task-events'
+
+    def __init__(self):
+        import redis
+        self._client = redis.Redis.from_url(settings.REDIS_URL)
+        self._listener = None
+
+    def publish(self, event: dict):
+        self._client.publish(self.channel, json.dumps(event))
+
+    def start(self):
+        """Start listening in the running event loop, once"""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self):
+        import redis.asyncio
+        while True:
+            try:
+                client = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            hub.dispatch(json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Task event listener lost its Redis connection, reconnecting")
+                await asyncio.sleep(1)
+
+async def event_stream(subscription: Subscription):
+    """
+    Yield a subscription's events in Server-Sent Events format
+
+    Idle streams get a keepalive comment every HEARTBEAT_INTERVAL seconds so
+    proxies keep them open. The subscription is removed when the client
+    disconnects or after a `resync` event, which tells the client to fetch
+    /api/tasks/changes and reconnect.
+    """
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            if event['type'] == 'resync':
+                return
+    finally:
+        hub.unsubscribe(subscription)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker():
+    """The broker configured by TASK_EVENTS_BROKER, created on first use"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(
+                getattr(settings, 'TASK_EVENTS_BROKER', 'backend.events.LocalBroker')
+            )()
+        return _broker
+
+def publish(event_type, tasks=None, projects=(), users=(), using=None, **extra):
+    """
+    Publish an event once the current transaction commits
+
+    Args:
+        event_type: created, updated, deleted or access
+        tasks: (id, project_id, assigned_to_id, created_by_id) of the
+            changed tasks before and after the change, or None if not known
+        projects: Ids of further projects whose members may see the change
+        users: Ids of further users who may see the change
+        using: Database alias of the transaction
+        extra: Further fields of the event
+    """
+    scopes = list({tuple(scope) for scope in tasks}) if tasks is not None else None
+    projects, users = set(projects), set(users)
+    for _, project_id, *user_ids in scopes or ():
+        projects.add(project_id)
+        users.update(user_ids)
+    event = {
+        'type': event_type,
+        'tasks': scopes,
+        'projects': sorted({project_id for project_id in projects if project_id}),
+        'users': sorted({user_id for user_id in users if user_id}),
+        **extra,
+    }
+
+    def send():
+        try:
+            get_broker().publish(event)
+        except Exception:
+            # Pushing is best effort; clients catch up through /changes
+            logger.exception("Could not publish task event")
+
+    transaction.on_commit(send, using=using)
@@ -0,0 +1,261 @@
+"""
+Prometheus metrics for API latency and database use
+
+MetricsMiddleware records, per Ninja operation (`list_tasks`, `login`, ...):
+
+    api_request_duration_seconds         histogram, by route, method and status
+    api_db_queries_total                 SQL statements run
+    api_db_query_duration_seconds_total  time spent in them
+    api_requests_in_flight               requests being handled
+
+alongside the auth token cache and response cache hit counters. GET
+/metrics serves them in the Prometheus text format.
+
+Each worker process keeps its metrics in memory. With METRICS_DIR set, it
+also writes them to `<METRICS_DIR>/<pid>.json` at most every
+METRICS_FLUSH_INTERVAL seconds, and /metrics adds up the files of all
+workers, so any worker answers for the whole server. Counters of workers
+that have exited are kept, like Prometheus' own multiprocess mode; their
+in-flight requests are not. Clear the directory when the server restarts.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from django.conf import settings
+from django.http import HttpResponse
+from users.auth import token_cache
+from .querycount import QueryRecorder, arecording, recording
+from .responsecache import counters as response_cache_counters
+from .utils import WrappingMiddleware, get_operation_name
+
+# Upper bounds in seconds of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Route label of requests not handled by the API
+OTHER_ROUTE = 'other'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class Metrics:
+    """Thread-safe metrics of the current process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (route, method, status) -> cumulative bucket counts, then sum and count
+        self.durations = {}
+        self.queries = Counter()
+        self.query_seconds = Counter()
+        self.in_flight = 0
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finish(self, route, method, status, seconds, queries, query_seconds):
+        """Record a handled request"""
+        key = (route, method, str(status))
+        with self._lock:
+            self.in_flight -= 1
+            histogram = self.durations.get(key)
+            if histogram is None:
+                histogram = self.durations[key] = [0] * len(DURATION_BUCKETS) + [0.0, 0]
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    histogram[index] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+            self.queries[route] += queries
+            self.query_seconds[route] += query_seconds
+
+    def snapshot(self) -> dict:
+        """This process's metrics as JSON-serializable data"""
+        with self._lock:
+            snapshot = {
+                'durations': [[*key, *values] for key, values in self.durations.items()],
+                'queries': dict(self.queries),
+                'query_seconds': dict(self.query_seconds),
+                'in_flight': self.in_flight,
+            }
+        cache_stats = response_cache_counters.stats()
+        snapshot.update({
+            'token_cache': {'hits': token_cache.hits, 'misses': token_cache.misses},
+            'response_cache': {
+                route: {'hits': stats['hits'], 'misses': stats['misses']}
+                for route, stats in cache_stats.items()
+            },
+        })
+        return snapshot
+
+metrics = Metrics()
+
+def _metrics_dir():
+    return getattr(settings, 'METRICS_DIR', None)
+
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+def flush(force=False):
+    """Write this process's metrics to METRICS_DIR, at most once per interval"""
+    global _last_flush
+    directory = _metrics_dir()
+    if not directory:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < getattr(settings, 'METRICS_FLUSH_INTERVAL', 5):
+        return
+    if not _flush_lock.acquire(blocking=force):
+        # Another thread of this process is writing
+        return
+    try:
+        _last_flush = now
+        os.makedirs(directory, exist_ok=True)
+        # Write a temporary file and rename it so readers never see half a file
+        fd, path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(metrics.snapshot(), f)
+        os.replace(path, os.path.join(directory, f'{os.getpid()}.json'))
+    finally:
+        _flush_lock.release()
+
+atexit.register(lambda: flush(force=True))
+
+def _is_running(pid) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def collect() -> list:
+    """Snapshots of every worker process, this one's current"""
+    snapshots = [metrics.snapshot()]
+    directory = _metrics_dir()
+    if not directory or not os.path.isdir(directory):
+        return snapshots
+    flush(force=True)
+    snapshots = []
+    for name in os.listdir(directory):
+        pid, _, extension = name.partition('.')
+        if extension != 'json' or not pid.isdigit():
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not _is_running(int(pid)):
+            snapshot['in_flight'] = 0
+        snapshots.append(snapshot)
+    return snapshots
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels) -> str:
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return '{' + pairs + '}' if pairs else ''
+
+def render(snapshots) -> str:
+    """Sum the snapshots of all processes in the Prometheus text format"""
+    durations = {}
+    queries, query_seconds = Counter(), Counter()
+    token_hits = token_misses = in_flight = 0
+    cache_hits, cache_misses = Counter(), Counter()
+    for snapshot in snapshots:
+        for row in snapshot['durations']:
+            key, values = tuple(row[:3]), row[3:]
+            totals = durations.setdefault(key, [0] * len(values))
+            for index, value in enumerate(values):
+                totals[index] += value
+        queries.update(snapshot['queries'])
+        query_seconds.update(snapshot['query_seconds'])
+        in_flight += snapshot['in_flight']
+        token_hits += snapshot['token_cache']['hits']
+        token_misses += snapshot['token_cache']['misses']
+        for route, stats in snapshot['response_cache'].items():
+            cache_hits[route] += stats['hits']
+            cache_misses[route] += stats['misses']
+
+    lines = [
+        '# HELP api_request_duration_seconds API request duration by route',
+        '# TYPE api_request_duration_seconds histogram',
+    ]
+    for (route, method, status), values in sorted(durations.items()):
+        labels = {'route': route, 'method': method, 'status': status}
+        for bound, count in zip(DURATION_BUCKETS, values):
+            lines.append(f'api_request_duration_seconds_bucket{_labels(**labels, le=bound)} {count}')
+        lines.append(f'api_request_duration_seconds_bucket{_labels(**labels, le="+Inf")} {values[-1]}')
+        lines.append(f'api_request_duration_seconds_sum{_labels(**labels)} {values[-2]}')
+        lines.append(f'api_request_duration_seconds_count{_labels(**labels)} {values[-1]}')
+
+    def family(name, kind, help, samples):
+        lines.append(f'# HELP {name} {help}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in samples:
+            lines.append(f'{name}{_labels(**labels)} {value}')
+
+    family('api_db_queries_total', 'counter', 'SQL statements run by route',
+           [({'route': route}, count) for route, count in sorted(queries.items())])
+    family('api_db_query_duration_seconds_total', 'counter', 'Time spent in SQL by route',
+           [({'route': route}, seconds) for route, seconds in sorted(query_seconds.items())])
+    family('api_requests_in_flight', 'gauge', 'Requests being handled', [({}, in_flight)])
+    family('api_auth_token_cache_hits_total', 'counter', 'Access tokens found in the token cache',
+           [({}, token_hits)])
+    family('api_auth_token_cache_misses_total', 'counter', 'Access tokens verified and looked up',
+           [({}, token_misses)])
+    family('api_response_cache_hits_total', 'counter', 'Responses served from the response cache',
+           [({'route': route}, count) for route, count in sorted(cache_hits.items())])
+    family('api_response_cache_misses_total', 'counter', 'Responses rendered and stored in the response cache',
+           [({'route': route}, count) for route, count in sorted(cache_misses.items())])
+    return '\n'.join(lines) + '\n'
+
+class MetricsMiddleware(WrappingMiddleware):
+    """Record the duration and SQL of every request"""
+
+    @contextmanager
+    def wrap(self, request, outcome):
+        with self.measure(request, outcome) as recorder, recording(recorder):
+            yield
+
+    @asynccontextmanager
+    async def awrap(self, request, outcome):
+        with self.measure(request, outcome) as recorder:
+            async with arecording(recorder):
+                yield
+
+    @contextmanager
+    def measure(self, request, outcome):
+        """Time the request and record it, with the SQL the yielded recorder saw"""
+        recorder = QueryRecorder()
+        metrics.start()
+        start = time.perf_counter()
+        try:
+            yield recorder
+        finally:
+            metrics.finish(
+                get_operation_name(request) or OTHER_ROUTE, request.method,
+                outcome.response.status_code if outcome.response is not None else 500,
+                time.perf_counter() - start, recorder.count, recorder.duration,
+            )
+            flush()
+
+def metrics_view(request):
+    """
+    Serve the metrics of all workers
+
+    With METRICS_TOKEN set, scrapers must send it as a bearer token.
+    Without it the metrics are only served with DEBUG on.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token and not settings.DEBUG:
+        return HttpResponse(status=403)
+    if token and request.META.get('HTTP_AUTHORIZATION') != f'Bearer {token}':
+        return HttpResponse(status=401)
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
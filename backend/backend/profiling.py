@@ -0,0 +1,218 @@
+"""
+Opt-in per-request profiling with Server-Timing headers
+
+An admin sends `X-Profile: 1` with a request and ProfilingMiddleware adds a
+Server-Timing header breaking its time down into:
+
+    auth       AuthBearer.authenticate, including its user lookup
+    handler    the API handler, including its SQL
+    serialize  validating and dumping the handler's result with pydantic
+    render     encoding the response body to JSON
+    db         SQL statements, including those run in the phases above
+    other      everything else, e.g. middleware, routing and parameters
+    total      the request as seen by the middleware
+
+Handlers are timed by ProfiledRouter, and rendering by FastJSONRenderer.
+Ninja validates and dumps a handler's result between the two, so that
+gap is the serialize time; no ninja internals are patched. Browser dev
+tools show these next to the request's network timings. The header is only
+honoured for valid admin access tokens (checked from the token claims,
+without a query); other requests pass through untouched.
+
+With PROFILE_DIR set, a sample of profiled requests (PROFILE_SAMPLE_RATE)
+also writes a profile to that directory: a cProfile `.prof` file, or a
+pyinstrument `.html` report when pyinstrument is installed and
+PROFILE_TOOL is 'pyinstrument'. Both profile the thread running the
+middleware: under WSGI that is the whole request, under ASGI the event
+loop, so ORM calls made in sync_to_async's thread are left out and
+coroutines of concurrent requests are included.
+"""
+import contextvars
+import functools
+import inspect
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from ninja import Router
+from users.utils import decode_token
+from .querycount import QueryRecorder, arecording, recording
+from .utils import WrappingMiddleware, get_operation_name
+
+# Request header that turns profiling on, as found in request.META
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+# Phases in header order
+PHASES = ('auth', 'handler', 'serialize', 'render')
+
+_timings = contextvars.ContextVar('request_timings', default=None)
+
+class Timings:
+    """Seconds spent per phase of one request"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = QueryRecorder()
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        # SQL run inside a phase, e.g. auth's user lookup, so it isn't
+        # subtracted twice from the other time
+        self.nested_db = 0.0
+        # perf_counter() and SQL time when the handler returned, until
+        # rendering starts
+        self.handler_end = None
+
+    def add(self, phase, seconds, db=0.0):
+        # Async handlers record from the event loop and from ORM threads
+        with self._lock:
+            self.seconds[phase] += seconds
+            self.nested_db += db
+
+    def header(self, total, profile=None) -> str:
+        """The Server-Timing header value, durations in milliseconds"""
+        db = self.queries.duration
+        other = total - sum(self.seconds.values()) - db + self.nested_db
+        metrics = [f'{phase};dur={self.seconds[phase] * 1000:.2f}' for phase in PHASES]
+        metrics.append(f'db;dur={db * 1000:.2f};desc="{self.queries.count} queries"')
+        metrics.append(f'other;dur={max(other, 0.0) * 1000:.2f}')
+        metrics.append(f'total;dur={total * 1000:.2f}')
+        if profile:
+            metrics.append(f'profile;desc="{os.path.basename(profile)}"')
+        return ', '.join(metrics)
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to the current request's phase"""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    db = timings.queries.duration
+    if phase == 'render' and timings.handler_end:
+        # Ninja serialized the handler's result since it returned
+        returned, db_then = timings.handler_end
+        timings.handler_end = None
+        timings.add('serialize', start - returned, db - db_then)
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        timings.add(phase, end - start, timings.queries.duration - db)
+        if phase == 'handler':
+            timings.handler_end = (end, timings.queries.duration)
+
+def profiled(phase):
+    """
+    Decorator timing a function, sync or async, as a request phase
+
+        @profiled('auth')
+        def authenticate(self, request, token): ...
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timed(phase):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class ProfiledRouter(Router):
+    """Router timing its handlers as the `handler` phase"""
+
+    def add_api_operation(self, path, methods, view_func, **kwargs):
+        return super().add_api_operation(path, methods, profiled('handler')(view_func), **kwargs)
+
+def _is_admin_request(request) -> bool:
+    """Whether the request carries a valid access token of an admin"""
+    scheme, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return False
+    payload = decode_token(token)
+    if not payload or payload.get('type') != 'access':
+        return False
+    return payload.get('role') == get_user_model().ROLE_ADMIN or payload.get('is_staff', False)
+
+def _profiler():
+    """A started profiler and the extension of its output, or (None, None)"""
+    if getattr(settings, 'PROFILE_TOOL', 'cprofile') == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:  # pragma: no cover - optional dependency
+            pass
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return profiler, 'html'
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler, 'prof'
+
+def _write_profile(profiler, extension, request) -> str:
+    """Stop the profiler and write its output to PROFILE_DIR"""
+    route = get_operation_name(request) or 'request'
+    path = os.path.join(
+        settings.PROFILE_DIR,
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{route}-{os.getpid()}-{time.monotonic_ns() % 10**6}.{extension}",
+    )
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    if extension == 'html':
+        profiler.stop()
+        with open(path, 'w') as f:
+            f.write(profiler.output_html())
+    else:
+        profiler.disable()
+        profiler.dump_stats(path)
+    return path
+
+class ProfilingMiddleware(WrappingMiddleware):
+    """Time the phases of requests that ask for it and report them in Server-Timing"""
+
+    @staticmethod
+    def wanted(request) -> bool:
+        return bool(request.META.get(PROFILE_HEADER)) and _is_admin_request(request)
+
+    @contextmanager
+    def wrap(self, request, outcome):
+        if not self.wanted(request):
+            yield
+            return
+        with self.measure(request, outcome) as timings, recording(timings.queries):
+            yield
+
+    @asynccontextmanager
+    async def awrap(self, request, outcome):
+        if not self.wanted(request):
+            yield
+            return
+        with self.measure(request, outcome) as timings:
+            async with arecording(timings.queries):
+                yield
+
+    @contextmanager
+    def measure(self, request, outcome):
+        """Time the block and add the Server-Timing header to outcome.response"""
+        timings = Timings()
+        profiler = extension = None
+        if getattr(settings, 'PROFILE_DIR', None) and random.random() < getattr(settings, 'PROFILE_SAMPLE_RATE', 1.0):
+            profiler, extension = _profiler()
+
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        try:
+            yield timings
+        finally:
+            total = time.perf_counter() - start
+            _timings.reset(token)
+            path = _write_profile(profiler, extension, request) if profiler else None
+        outcome.response['Server-Timing'] = timings.header(total, path)
@@ -0,0 +1,26 @@
+"""
+Pytest plugin enforcing per-route query budgets
+
+Enable it with `-p backend.pytest_plugin` (or `pytest_plugins` in a
+conftest). Every request made through the Django test client is recorded by
+QueryInspectorMiddleware; if any API route runs more queries than declared
+with @query_budget, the run fails and the offending routes are listed.
+"""
+from . import querycount
+
+def pytest_configure(config):
+    querycount.force_enabled = True
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not querycount.budget_violations:
+        return
+    terminalreporter.section("query budget violations")
+    worst = {}
+    for route, count, budget in querycount.budget_violations:
+        worst[route] = (max(count, worst.get(route, (0,))[0]), budget)
+    for route, (count, budget) in sorted(worst.items()):
+        terminalreporter.write_line(f"{route}: {count} queries (budget {budget})")
+
+def pytest_sessionfinish(session, exitstatus):
+    if querycount.budget_violations and session.exitstatus == 0:
+        session.exitstatus = 1
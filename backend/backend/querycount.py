@@ -0,0 +1,164 @@
+"""
+Per-request SQL recording, N+1 detection and query budgets
+
+QueryInspectorMiddleware records every SQL statement executed while a
+request is handled. It adds the query count and total database time to the
+response headers, logs a per-route summary, and warns when the same
+statement shape runs repeatedly, which usually means an N+1 query.
+
+API handlers declare the most queries they may run with @query_budget.
+Requests exceeding their budget are logged and collected in
+`budget_violations`, which the pytest plugin in backend.pytest_plugin turns
+into a failing test run.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from .utils import WrappingMiddleware, get_operation
+
+logger = logging.getLogger(__name__)
+
+# Set by the pytest plugin to record requests even when DEBUG is off
+force_enabled = False
+
+# Requests that ran more queries than their route's budget:
+# list of (route, query count, budget)
+budget_violations = []
+
+# Highest query count observed per route
+route_query_counts = {}
+
+def query_budget(max_queries: int):
+    """
+    Declare the maximum number of SQL queries an API route may run
+    
+    Apply it below the router decorator:
+    
+        @router.get("/", response=TaskListOut, auth=auth)
+        @query_budget(3)
+        def list_tasks(request): ...
+    """
+    def decorator(func):
+        func.query_budget = max_queries
+        return func
+    return decorator
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)")
+
+def normalize_sql(sql: str) -> str:
+    """Reduce a statement to its shape, ignoring literals and IN list lengths"""
+    sql = _LITERALS.sub('?', sql)
+    return _IN_LISTS.sub('IN (...)', sql)
+
+class QueryRecorder:
+    """Database execute wrapper recording each statement and its duration"""
+    
+    def __init__(self):
+        self.queries = []  # list of (sql, seconds)
+    
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+    
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+    
+    @property
+    def duration(self) -> float:
+        return sum(duration for _, duration in self.queries)
+    
+    def repeated(self, threshold: int):
+        """Return statement shapes executed at least `threshold` times"""
+        shapes = Counter(normalize_sql(sql) for sql, _ in self.queries)
+        return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+@contextmanager
+def recording(recorder: QueryRecorder):
+    """Record the statements run on every database connection in the block"""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+@asynccontextmanager
+async def arecording(recorder: QueryRecorder):
+    """
+    recording() for async code
+    
+    Connections are per thread, and the async ORM runs its queries in
+    sync_to_async's thread, so the wrappers are installed there.
+    """
+    stack = ExitStack()
+    await sync_to_async(stack.enter_context)(recording(recorder))
+    try:
+        yield recorder
+    finally:
+        await sync_to_async(stack.close)()
+
+class QueryInspectorMiddleware(WrappingMiddleware):
+    """
+    Record SQL per request and flag N+1 patterns and budget overruns
+    
+    Active when QUERY_INSPECTOR_ENABLED is set (defaults to DEBUG) or when
+    running under the pytest plugin.
+    """
+    
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.enabled = getattr(settings, 'QUERY_INSPECTOR_ENABLED', settings.DEBUG)
+        self.repeat_threshold = getattr(settings, 'QUERY_INSPECTOR_REPEAT_THRESHOLD', 5)
+    
+    @contextmanager
+    def wrap(self, request, outcome):
+        if not (self.enabled or force_enabled):
+            yield
+            return
+        with recording(QueryRecorder()) as recorder:
+            yield
+        self.report(request, outcome.response, recorder)
+    
+    @asynccontextmanager
+    async def awrap(self, request, outcome):
+        if not (self.enabled or force_enabled):
+            yield
+            return
+        async with arecording(QueryRecorder()) as recorder:
+            yield
+        self.report(request, outcome.response, recorder)
+    
+    def report(self, request, response, recorder):
+        """Add the query headers to the response, log and check the budget"""
+        operation = get_operation(request)
+        route = operation.view_func.__name__ if operation else request.path
+        response['X-DB-Query-Count'] = str(recorder.count)
+        response['X-DB-Time'] = f"{recorder.duration * 1000:.2f}ms"
+        logger.debug(
+            "%s %s: %d queries in %.2fms",
+            request.method, route, recorder.count, recorder.duration * 1000
+        )
+        
+        for shape, count in recorder.repeated(self.repeat_threshold).items():
+            logger.warning(
+                "Possible N+1 in %s %s: statement ran %d times: %s",
+                request.method, route, count, shape
+            )
+        
+        if operation is not None:
+            route_query_counts[route] = max(route_query_counts.get(route, 0), recorder.count)
+            budget = getattr(operation.view_func, 'query_budget', None)
+            if budget is not None and recorder.count > budget:
+                budget_violations.append((route, recorder.count, budget))
+                logger.warning(
+                    "%s %s ran %d queries, over its budget of %d",
+                    request.method, route, recorder.count, budget
+                )
@@ -0,0 +1,35 @@
+"""
+JSON renderer for the API
+
+FastJSONRenderer encodes responses with orjson when it is installed and
+falls back to Django Ninja's JSONRenderer otherwise. Dates and datetimes
+are still formatted by NinjaJSONEncoder, so both produce the same JSON
+values whichever is in use.
+"""
+from ninja.renderers import JSONRenderer
+from ninja.responses import NinjaJSONEncoder
+from .profiling import profiled
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer using orjson when available"""
+
+    # Dates go through NinjaJSONEncoder to keep Django's format (e.g. "Z"
+    # for UTC and millisecond precision); int dict keys become strings
+    # like with json.dumps
+    orjson_options = (
+        (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+    )
+
+    def __init__(self):
+        self._default = self.encoder_class().default
+
+    @profiled('render')
+    def render(self, request, data, *, response_status):
+        if orjson is None:
+            return super().render(request, data, response_status=response_status)
+        return orjson.dumps(data, default=self._default, option=self.orjson_options)
@@ -0,0 +1,206 @@
+"""
+Per-user response cache for read-mostly API endpoints
+
+Rendered responses are stored in a Django cache (RESPONSE_CACHE_ALIAS,
+local memory unless CACHES says otherwise) under keys built from version
+stamps:
+
+- one per user, bumped when the user or their memberships change
+- one per project, bumped when the project, its members or its tasks change
+- one global stamp, bumped on every change, for admins who see everything
+
+A standard user's entries depend on their own stamp and the stamps of every
+project they can see tasks in. Writes never delete entries; they replace
+the stamps once the transaction commits, so later requests compute new
+keys and old entries simply expire.
+"""
+import functools
+import hashlib
+import threading
+import uuid
+from collections import Counter
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseNotModified
+from ninja.utils import contribute_operation_callback
+from .conditional import etag_matches
+
+# Headers stored with a cached response and replayed on hits
+CACHED_HEADERS = ('ETag', 'Cache-Control', 'Vary')
+
+GLOBAL_VERSION_KEY = 'response-version:all'
+
+def _cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+def _timeout():
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+def _user_version_key(user_id):
+    return f'response-version:user:{user_id}'
+
+def _project_version_key(project_id):
+    return f'response-version:project:{project_id}'
+
+class CacheCounters:
+    """Thread-safe hit and miss counters per route"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+    
+    def record(self, route: str, hit: bool):
+        with self._lock:
+            (self.hits if hit else self.misses)[route] += 1
+    
+    def stats(self) -> dict:
+        """Return hits, misses and hit rate per route"""
+        with self._lock:
+            routes = set(self.hits) | set(self.misses)
+            return {
+                route: {
+                    "hits": self.hits[route],
+                    "misses": self.misses[route],
+                    "hit_rate": self.hits[route] / (self.hits[route] + self.misses[route]),
+                }
+                for route in sorted(routes)
+            }
+    
+    def clear(self):
+        with self._lock:
+            self.hits.clear()
+            self.misses.clear()
+
+counters = CacheCounters()
+
+def invalidate(projects=(), users=(), using=None):
+    """
+    Bump the version stamps of projects and users once the transaction commits
+    
+    Args:
+        projects: Ids of projects whose data changed
+        users: Ids of users whose data or visibility changed
+        using: Database alias of the transaction
+    """
+    keys = [GLOBAL_VERSION_KEY]
+    keys += [_project_version_key(project_id) for project_id in set(projects) if project_id]
+    keys += [_user_version_key(user_id) for user_id in set(users) if user_id]
+    
+    def bump():
+        _cache().set_many({key: uuid.uuid4().hex for key in keys}, timeout=None)
+    
+    transaction.on_commit(bump, using=using)
+
+async def _versions(keys) -> dict:
+    """Return version stamps for keys, starting fresh ones where missing"""
+    cache = _cache()
+    versions = await cache.aget_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        # A stamp that was evicted must not come back with an old value
+        await cache.aset_many(missing, timeout=None)
+        versions.update(missing)
+    return versions
+
+async def _visible_project_ids(user, user_version) -> list:
+    """Ids of projects a standard user can see tasks in, cached per user version"""
+    # Imported here: the models import this module to invalidate entries
+    from projects.models import Project
+    from tasks.models import Task
+    
+    cache = _cache()
+    key = f'response-scope:{user.pk}:{user_version}'
+    project_ids = await cache.aget(key)
+    if project_ids is None:
+        member_of = Project.members.through.objects.filter(user_id=user.pk).values_list('project_id')
+        involved_in = Task.objects.filter(
+            Q(assigned_to_id=user.pk) | Q(created_by_id=user.pk)
+        ).values_list('project_id')
+        project_ids = sorted({project_id async for (project_id,) in member_of.union(involved_in)})
+        await cache.aset(key, project_ids, _timeout())
+    return project_ids
+
+async def _entry_key(route: str, request, varies_with=None) -> str:
+    """Cache key of a request's response for the current data versions"""
+    user = request.auth
+    user_key = _user_version_key(user.pk)
+    if user.is_admin:
+        versions = await _versions([user_key, GLOBAL_VERSION_KEY])
+        scope = versions[GLOBAL_VERSION_KEY]
+    else:
+        user_version = (await _versions([user_key]))[user_key]
+        project_keys = [
+            _project_version_key(project_id)
+            for project_id in await _visible_project_ids(user, user_version)
+        ]
+        versions = await _versions([user_key, *project_keys])
+        scope = [versions[key] for key in project_keys]
+    extra = varies_with(request) if varies_with else None
+    key = repr((user.pk, request.get_full_path(), versions[user_key], scope, extra))
+    return f'response:{route}:{hashlib.sha1(key.encode()).hexdigest()}'
+
+def _cached_response(request, entry) -> HttpResponse:
+    """Rebuild a response from a cache entry"""
+    content, content_type, headers = entry
+    if 'ETag' in headers and etag_matches(headers['ETag'], request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type=content_type)
+    for header, value in headers.items():
+        response[header] = value
+    response['X-Response-Cache'] = 'hit'
+    return response
+
+def _store_responses(operation):
+    """Wrap an operation's run() to cache the rendered responses of misses"""
+    run = operation.run
+    
+    async def run_and_store(request, **kwargs):
+        response = await run(request, **kwargs)
+        key = getattr(request, '_response_cache_key', None)
+        if key and response.status_code == 200:
+            headers = {header: response[header] for header in CACHED_HEADERS if header in response}
+            entry = (response.content, response['Content-Type'], headers)
+            await _cache().aset(key, entry, _timeout())
+            response['X-Response-Cache'] = 'miss'
+        return response
+    
+    operation.run = run_and_store
+
+def cache_response(func=None, *, varies_with=None):
+    """
+    Serve an async API handler's responses from the per-user cache
+    
+    Apply it below the router decorator. On a hit the handler is skipped
+    and the stored response (or a 304 when its ETag matches) is returned;
+    on a miss the rendered 200 response is stored.
+    
+        @router.get("/stats", response=TaskStatsOut, auth=async_auth)
+        @cache_response
+        async def get_task_stats(request): ...
+    
+    Responses that depend on more than the data, such as the current date,
+    pass `varies_with`, a function of the request whose (repr-able) result
+    becomes part of the key, so a change in it is a miss like a write is.
+    
+        @cache_response(varies_with=lambda request: date.today())
+    """
+    if func is None:
+        return functools.partial(cache_response, varies_with=varies_with)
+    route = func.__name__
+    
+    @functools.wraps(func)
+    async def wrapper(request, *args, **kwargs):
+        key = await _entry_key(route, request, varies_with)
+        entry = await _cache().aget(key)
+        counters.record(route, hit=entry is not None)
+        if entry is not None:
+            return _cached_response(request, entry)
+        request._response_cache_key = key
+        return await func(request, *args, **kwargs)
+    
+    contribute_operation_callback(wrapper, _store_responses)
+    return wrapper
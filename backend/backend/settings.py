@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 import os
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -53,11 +54,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'backend.profiling.ProfilingMiddleware',
+    'backend.querycount.QueryInspectorMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'backend.static.WhiteNoiseMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -69,6 +73,10 @@ CORS_ALLOWED_ORIGINS = [
     "https://task-management-frontend-smoky-seven.vercel.app"
 ]
 
+# Let the frontend ask for profiling and read the timings (see backend.profiling)
+CORS_ALLOW_HEADERS = (*default_headers, 'x-profile')
+CORS_EXPOSE_HEADERS = ['Server-Timing']
+
 ROOT_URLCONF = 'backend.urls'
 
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
@@ -118,6 +126,16 @@ CONN_MAX_AGE = 60  # Keep connections alive for 60 seconds
 # settings.py
 AUTH_USER_MODEL = 'users.User'
 
+# API logins use email (users.backends.EmailBackend); the admin site logs in
+# with username
+AUTHENTICATION_BACKENDS = [
+    'users.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Threads hashing passwords for async logins; defaults to the CPU count
+LOGIN_HASH_WORKERS = None
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -161,3 +179,70 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# JWT authentication
+# Verified tokens are cached per process; changes to a user invalidate the
+# cache in the process handling the change, other workers pick them up
+# once the TTL expires.
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 60  # seconds
+
+# Build the request user from token claims only, never querying the database
+AUTH_CLAIMS_ONLY = False
+
+
+# SQL query inspection (see backend.querycount)
+# Adds query counts and DB time to responses and logs likely N+1 queries
+QUERY_INSPECTOR_ENABLED = DEBUG
+QUERY_INSPECTOR_REPEAT_THRESHOLD = 5
+
+
+# Per-request profiling (see backend.profiling)
+# Admin requests with an `X-Profile: 1` header get a Server-Timing header.
+# With PROFILE_DIR set, that share of them also writes a profile there
+# ('cprofile', or 'pyinstrument' if installed).
+PROFILE_DIR = os.environ.get('PROFILE_DIR')
+PROFILE_SAMPLE_RATE = 0.1
+PROFILE_TOOL = 'cprofile'
+
+
+# Prometheus metrics at /metrics (see backend.metrics)
+# With several worker processes, point METRICS_DIR at a directory they all
+# share (e.g. under /tmp, emptied on restart) so /metrics covers them all.
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 5  # seconds
+# Bearer token scrapers must send; without it /metrics is only served
+# with DEBUG on
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+
+# Caches
+# Local memory by default. Set REDIS_URL to share the cache between worker
+# processes, so invalidations reach every worker.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Per-user response cache for stats and project listings (see backend.responsecache)
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 300  # seconds
+
+# Broker for task change events pushed over /api/tasks/events (see
+# backend.events). The local broker only reaches clients connected to the
+# same process; with REDIS_URL every worker gets every event.
+TASK_EVENTS_BROKER = (
+    'backend.events.RedisBroker' if REDIS_URL else 'backend.events.LocalBroker'
+)
@@ -0,0 +1,38 @@
+"""
+Static file serving that doesn't force the middleware chain to be sync
+
+WhiteNoise's middleware is sync-only. Under ASGI one sync middleware makes
+Django adapt the whole chain around it, so every API request, static or
+not, crosses into a thread and back. WhiteNoiseMiddleware here also runs
+natively in async chains: requests for other paths go straight on to the
+next middleware, and only static files are served from a thread.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """WhiteNoiseMiddleware for sync and async chains"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Looks at the file system, which only happens with DEBUG
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
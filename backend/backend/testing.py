@@ -0,0 +1,73 @@
+"""
+Test helpers for API endpoints
+
+ApiTestCase sends requests through the Django test client with a bearer
+token and fails a test when a request runs more queries than its route's
+@query_budget. Each request starts with an empty token cache, so budgets
+are checked against the cold path including the user lookup. The same
+budgets fail a whole pytest run through backend.pytest_plugin.
+"""
+import json
+from django.core.cache import caches
+from django.conf import settings
+from django.test import TestCase
+from users.auth import token_cache
+from users.utils import create_token
+from . import querycount, responsecache
+
+class ApiTestCase(TestCase):
+    """TestCase with authenticated API requests checked against query budgets"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._inspector_enabled = querycount.force_enabled
+        querycount.force_enabled = True
+
+    @classmethod
+    def tearDownClass(cls):
+        querycount.force_enabled = cls._inspector_enabled
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.clear_response_cache()
+    
+    def clear_response_cache(self):
+        """Drop cached responses; writes in a test never commit, so they don't invalidate"""
+        caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')].clear()
+        responsecache.counters.clear()
+
+    def auth_headers(self, user) -> dict:
+        """Headers authenticating as user, for the `headers` of a test client request"""
+        token = create_token(user.id, user.username, user.role, is_staff=user.is_staff)
+        return {'Authorization': f'Bearer {token}'}
+
+    def api(self, method, path, user=None, data=None, **extra):
+        """
+        Send an API request and check it stayed within its query budget
+
+        Args:
+            method: get, post, put or delete
+            path: Path below /api, e.g. "/tasks/"
+            user: User to authenticate as, if any
+            data: Query parameters for GET and DELETE, a JSON body otherwise
+            extra: Further arguments for the test client
+        """
+        if user is not None:
+            extra['headers'] = {**self.auth_headers(user), **extra.get('headers', {})}
+        if data is not None and method not in ('get', 'delete'):
+            data = json.dumps(data)
+            extra.setdefault('content_type', 'application/json')
+        token_cache.clear()
+        violations = len(querycount.budget_violations)
+        response = getattr(self.client, method)(f'/api{path}', data, **extra)
+        self.assertWithinBudget(violations)
+        return response
+
+    def assertWithinBudget(self, violations_before=0):
+        """Fail if requests since `violations_before` went over their budget"""
+        violations = querycount.budget_violations[violations_before:]
+        self.assertFalse(violations, "Query budget exceeded: " + ", ".join(
+            f"{route} ran {count} queries (budget {budget})" for route, count, budget in violations
+        ))
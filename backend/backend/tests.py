@@ -0,0 +1,134 @@
+import asyncio
+import re
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.utils.module_loading import import_string
+from projects.models import Project
+from users.auth import token_cache
+from .events import EventHub
+from .metrics import metrics
+from .testing import ApiTestCase
+
+User = get_user_model()
+
+@override_settings(MIDDLEWARE=['backend.querycount.QueryInspectorMiddleware'])
+class QueryInspectorTests(ApiTestCase):
+    """Queries are counted whether the middleware chain is sync or async"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='alice', email='alice@example.com')
+        Project.objects.create(name='Apollo', created_by=cls.user).members.add(cls.user)
+
+    def test_sync_chain(self):
+        response = self.api('get', '/projects/stats', user=self.user)
+        self.assertEqual(response['X-DB-Query-Count'], '3')
+
+    async def test_async_chain(self):
+        token_cache.clear()
+        response = await self.async_client.get('/api/projects/stats', headers=self.auth_headers(self.user))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-DB-Query-Count'], '3')
+
+
+class MetricsTests(ApiTestCase):
+    """Metrics are recorded in sync and async chains and not served to anyone"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='alice', email='alice@example.com')
+
+    def test_denied_without_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+        self.assertContains(response, 'api_request_duration_seconds')
+
+    @override_settings(MIDDLEWARE=['backend.metrics.MetricsMiddleware'])
+    async def test_async_chain(self):
+        before = metrics.queries['get_project_stats']
+        token_cache.clear()
+        response = await self.async_client.get('/api/projects/stats', headers=self.auth_headers(self.user))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(metrics.queries['get_project_stats'] - before, 3)
+
+
+@override_settings(MIDDLEWARE=['backend.profiling.ProfilingMiddleware'])
+class ProfilingTests(ApiTestCase):
+    """Admins get Server-Timing from sync and async chains, others don't"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='alice', email='alice@example.com')
+        cls.admin = User.objects.create(username='root', email='root@example.com', role=User.ROLE_ADMIN)
+
+    def assertTimings(self, response):
+        self.assertEqual(response.status_code, 200)
+        metrics = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        self.assertEqual(metrics, ['auth', 'handler', 'serialize', 'render', 'db', 'other', 'total'])
+        durations = dict(re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing']))
+        self.assertGreater(float(durations['handler']), 0)
+        self.assertGreater(float(durations['serialize']), 0)
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    def test_sync_chain(self):
+        self.assertTimings(self.api('get', '/auth/me', user=self.admin, headers={'X-Profile': '1'}))
+
+    async def test_async_chain(self):
+        token_cache.clear()
+        response = await self.async_client.get(
+            '/api/auth/me', headers={**self.auth_headers(self.admin), 'X-Profile': '1'}
+        )
+        self.assertTimings(response)
+
+    def test_not_admin(self):
+        response = self.api('get', '/auth/me', user=self.user, headers={'X-Profile': '1'})
+        self.assertNotIn('Server-Timing', response)
+
+
+class MiddlewareTests(ApiTestCase):
+    """No middleware makes Django adapt an ASGI request's chain to sync"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='alice', email='alice@example.com')
+
+    def test_all_async_capable(self):
+        for path in settings.MIDDLEWARE:
+            with self.subTest(path):
+                self.assertTrue(getattr(import_string(path), 'async_capable', False))
+
+    # Django only logs the adaptation with DEBUG on
+    @override_settings(DEBUG=True)
+    async def test_no_adaptation(self):
+        token_cache.clear()
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            response = await self.async_client.get('/api/projects/stats', headers=self.auth_headers(self.user))
+        self.assertEqual(response.status_code, 200)
+
+
+class EventHubTests(SimpleTestCase):
+    """Subscribers only hear about tasks they can see"""
+
+    async def receive(self, subscription):
+        return await asyncio.wait_for(subscription.queue.get(), 1)
+
+    async def test_task_ids_are_filtered_per_subscriber(self):
+        hub = EventHub()
+        member = hub.subscribe(1, False, [10])
+        assignee = hub.subscribe(2, False, [])
+        admin = hub.subscribe(3, True, [])
+        hub.dispatch({
+            'type': 'updated',
+            # Task 100 in project 10, task 200 moved from project 10 to 20
+            # and assigned to user 2, task 300 in project 30
+            'tasks': [[100, 10, None, 5], [200, 10, None, 5], [200, 20, 2, 5], [300, 30, None, 5]],
+            'projects': [10, 20, 30], 'users': [2, 5],
+        })
+        self.assertEqual((await self.receive(member))['tasks'], [100, 200])
+        self.assertEqual((await self.receive(assignee))['tasks'], [200])
+        self.assertEqual((await self.receive(admin))['tasks'], [100, 200, 300])
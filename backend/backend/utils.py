@@ -0,0 +1,85 @@
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Optional
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+def get_operation(request):
+    """
+    Return the Django Ninja operation that handles a request
+    
+    Args:
+        request: HTTP request that has been resolved to a view
+        
+    Returns:
+        The ninja Operation, or None if the view isn't a Ninja API view
+    """
+    match = getattr(request, 'resolver_match', None)
+    path_view = getattr(getattr(match, 'func', None), '__self__', None)
+    find_operation = getattr(path_view, '_find_operation', None)
+    if find_operation is None:
+        return None
+    return find_operation(request)
+
+def get_operation_name(request) -> Optional[str]:
+    """
+    Return the name of the API operation that handles a request
+    
+    The name is the handler function's name (e.g. "list_tasks"), which is
+    also its OpenAPI operation id.
+    """
+    operation = get_operation(request)
+    if operation is None:
+        return None
+    return operation.view_func.__name__
+
+class WrappingMiddleware:
+    """
+    Base for middleware that wraps the rest of the chain, sync or async
+    
+    Subclasses implement wrap(request, outcome) as a generator context
+    manager: the code before its `yield` runs before the request is
+    handled, the code after it once the response is in `outcome.response`,
+    which it may replace. Exceptions from the chain are raised at the
+    `yield`. The middleware runs natively in sync and async chains, so
+    under ASGI it doesn't force a switch to a thread. Async chains go
+    through awrap(), which uses wrap() unless a subclass has to await
+    something around the request.
+    
+        class TimingMiddleware(WrappingMiddleware):
+            @contextmanager
+            def wrap(self, request, outcome):
+                start = time.perf_counter()
+                yield
+                outcome.response['X-Time'] = str(time.perf_counter() - start)
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+    
+    def wrap(self, request, outcome):
+        raise NotImplementedError
+    
+    @asynccontextmanager
+    async def awrap(self, request, outcome):
+        with self.wrap(request, outcome):
+            yield
+    
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        outcome = SimpleNamespace(response=None)
+        with self.wrap(request, outcome):
+            outcome.response = self.get_response(request)
+        return outcome.response
+    
+    async def __acall__(self, request):
+        outcome = SimpleNamespace(response=None)
+        async with self.awrap(request, outcome):
+            outcome.response = await self.get_response(request)
+        return outcome.response
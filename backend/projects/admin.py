@@ -1,8 +1,10 @@
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils.html import format_html
 from django.urls import reverse
 from .models import Project
-from tasks.models import Task
+from tasks.models import Task, TaskRollup
 
 class TaskInline(admin.TabularInline):
     """Inline admin for tasks within a project"""
@@ -21,6 +23,9 @@ class ProjectAdmin(admin.ModelAdmin):
     # Fields to display in the list view
     list_display = ('name', 'status_badge', 'created_by_link', 'created_at', 'updated_at', 'member_count', 'task_count')
     
+    # Load the creator with each row for created_by_link
+    list_select_related = ('created_by',)
+    
     # Fields to filter by in the right sidebar
     list_filter = ('status', 'created_at', 'updated_at')
     
@@ -70,19 +75,19 @@ class ProjectAdmin(admin.ModelAdmin):
     
     def member_count(self, obj):
         """Return the number of members in the project"""
-        count = obj.members.count()
         # Fix: Use the correct URL name for the custom admin site
         url = reverse('admin:users_user_changelist')
-        return format_html('<a href="{}?projects__id__exact={}">{} members</a>', url, obj.id, count)
+        return format_html('<a href="{}?projects__id__exact={}">{} members</a>', url, obj.id, obj.num_members)
     member_count.short_description = 'Members'
+    member_count.admin_order_field = 'num_members'
     
     def task_count(self, obj):
         """Return the number of tasks in the project"""
-        count = obj.tasks.count()
         # Fix: Use the correct URL name for the custom admin site
         url = reverse('admin:tasks_task_changelist')
-        return format_html('<a href="{}?project__id__exact={}">{} tasks</a>', url, obj.id, count)
+        return format_html('<a href="{}?project__id__exact={}">{} tasks</a>', url, obj.id, obj.num_tasks)
     task_count.short_description = 'Tasks'
+    task_count.admin_order_field = 'num_tasks'
     
     def created_by_link(self, obj):
         """Return a link to the user who created the project"""
@@ -130,9 +135,28 @@ class ProjectAdmin(admin.ModelAdmin):
     mark_as_cancelled.short_description = "Mark selected projects as cancelled"
     
     def get_queryset(self, request):
-        """Optimize queryset with prefetch_related"""
+        """
+        Annotate member and task counts for the count columns
+        
+        Both are correlated subqueries rather than joins, so the two counts
+        don't multiply each other's rows. Task counts add up the project's
+        task rollups, whose number doesn't grow with the number of tasks.
+        """
         queryset = super().get_queryset(request)
-        return queryset.prefetch_related('members', 'tasks')
+        members = (
+            Project.members.through.objects.filter(project=OuterRef('pk'))
+            .order_by().values('project')
+            .annotate(count=Count('user', distinct=True)).values('count')
+        )
+        tasks = (
+            TaskRollup.objects.filter(project=OuterRef('pk'))
+            .order_by().values('project')
+            .annotate(count=Sum('count')).values('count')
+        )
+        return queryset.annotate(
+            num_members=Coalesce(Subquery(members, output_field=IntegerField()), 0),
+            num_tasks=Coalesce(Subquery(tasks, output_field=IntegerField()), 0),
+        )
     
     def save_model(self, request, obj, form, change):
         """Ensure the creator is added as a member"""
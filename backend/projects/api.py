@@ -1,22 +1,37 @@
-from ninja import Router
-from django.shortcuts import get_object_or_404
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Max, Prefetch, Q
+from django.http import HttpResponse
 from .models import Project
 from .schemas import (
     ProjectCreateIn, ProjectUpdateIn, ProjectMemberIn,
     ProjectOut, ProjectDetailOut, ProjectStatsOut
 )
-from users.auth import AuthBearer
+from users.auth import AsyncAuthBearer, AuthBearer
+from backend.conditional import not_modified
+from backend.profiling import ProfiledRouter
+from backend.querycount import query_budget
+from backend.responsecache import cache_response
 from typing import List
 
 User = get_user_model()
-router = Router()
+router = ProfiledRouter()
 auth = AuthBearer()
+async_auth = AsyncAuthBearer()
+
+
+def _with_members(queryset):
+    """Load the creator and members serialized by ProjectDetailOut"""
+    return queryset.select_related('created_by').prefetch_related(
+        Prefetch('members', queryset=User.objects.only('id', 'username'))
+    )
 
 
 # Add this new endpoint to your projects router
-@router.get("/stats", response=ProjectStatsOut, auth=auth)
-def get_project_stats(request):
+@router.get("/stats", response=ProjectStatsOut, auth=async_auth)
+@query_budget(3)
+@cache_response
+async def get_project_stats(request):
     """Get project statistics by status"""
     user = request.auth
     
@@ -26,39 +41,46 @@ def get_project_stats(request):
     else:
         queryset = Project.objects.filter(members=user)
     
-    # Get counts by status
-    total = queryset.count()
-    active = queryset.filter(status=Project.STATUS_ACTIVE).count()
-    on_hold = queryset.filter(status=Project.STATUS_ON_HOLD).count()
-    completed = queryset.filter(status=Project.STATUS_COMPLETED).count()
-    archived = queryset.filter(status=Project.STATUS_ARCHIVED).count()
-    cancelled = queryset.filter(status=Project.STATUS_CANCELLED).count()
-    
-    return {
-        "total": total,
-        "active": active,
-        "onHold": on_hold,
-        "completed": completed,
-        "archived": archived,
-        "cancelled": cancelled
-    }
+    # Get counts by status in a single aggregate query
+    return await queryset.aaggregate(
+        total=Count("id"),
+        active=Count("id", filter=Q(status=Project.STATUS_ACTIVE)),
+        onHold=Count("id", filter=Q(status=Project.STATUS_ON_HOLD)),
+        completed=Count("id", filter=Q(status=Project.STATUS_COMPLETED)),
+        archived=Count("id", filter=Q(status=Project.STATUS_ARCHIVED)),
+        cancelled=Count("id", filter=Q(status=Project.STATUS_CANCELLED)),
+    )
 
 
 # Get all projects
-@router.get("/", response=List[ProjectOut], auth=auth)
-def list_projects(request):
+@router.get("/", response=List[ProjectOut], auth=async_auth)
+@query_budget(4)
+@cache_response
+async def list_projects(request, response: HttpResponse):
     """List all projects the user is a member of"""
     user = request.auth
-    # If user is admin, return all projects
-    if user.is_admin:
-        return Project.objects.all()
-    # Otherwise, return projects the user is a member of
-    return Project.objects.filter(members=user)
+    queryset = Project.objects.select_related('created_by').only(
+        *(field.name for field in Project._meta.concrete_fields),
+        'created_by__username',
+    )
+    # Admins see all projects, others the projects they are a member of
+    if not user.is_admin:
+        queryset = queryset.filter(members=user)
+    
+    # Edits and membership changes bump updated_at, creates and deletes
+    # change the count
+    version = await queryset.aaggregate(last_updated=Max('updated_at'), total=Count('id'))
+    unchanged = not_modified(request, response, version['last_updated'], version['total'])
+    if unchanged:
+        return unchanged
+    
+    return [project async for project in queryset]
 
 
 
 # Create a new project
 @router.post("/", response=ProjectOut, auth=auth)
+@query_budget(7)
 def create_project(request, data: ProjectCreateIn):
     """Create a new project"""
     user = request.auth
@@ -72,24 +94,26 @@ def create_project(request, data: ProjectCreateIn):
     return project
 
 # Get project details
-@router.get("/{project_id}", response=ProjectDetailOut, auth=auth)
-def get_project(request, project_id: int):
+@router.get("/{project_id}", response=ProjectDetailOut, auth=async_auth)
+@query_budget(3)
+async def get_project(request, project_id: int):
     """Get project details"""
     user = request.auth
-    project = get_object_or_404(Project, id=project_id)
+    project = await aget_object_or_404(_with_members(Project.objects.all()), id=project_id)
     
-    # Check if user is a member or admin
-    if not (user.is_admin or project.members.filter(id=user.id).exists()):
+    # Check if user is a member or admin, using the prefetched members
+    if not (user.is_admin or any(member.id == user.id for member in project.members.all())):
         return {"detail": "Not found"}
     
     return project
 
 # Update project
 @router.put("/{project_id}", response=ProjectOut, auth=auth)
+@query_budget(3)
 def update_project(request, project_id: int, data: ProjectUpdateIn):
     """Update project details"""
     user = request.auth
-    project = get_object_or_404(Project, id=project_id)
+    project = get_object_or_404(Project.objects.select_related('created_by'), id=project_id)
     
     # Check if user is admin or project creator
     if not (user.is_admin or project.created_by == user):
@@ -106,10 +130,11 @@ def update_project(request, project_id: int, data: ProjectUpdateIn):
 
 # Delete project
 @router.delete("/{project_id}", auth=auth)
+@query_budget(12)
 def delete_project(request, project_id: int):
     """Delete a project"""
     user = request.auth
-    project = get_object_or_404(Project, id=project_id)
+    project = get_object_or_404(Project.objects.select_related('created_by'), id=project_id)
     
     # Check if user is admin or project creator
     if not (user.is_admin or project.created_by == user):
@@ -120,10 +145,11 @@ def delete_project(request, project_id: int):
 
 # Add member to project
 @router.post("/{project_id}/members", response=ProjectDetailOut, auth=auth)
+@query_budget(9)
 def add_member(request, project_id: int, data: ProjectMemberIn):
     """Add a member to the project"""
     user = request.auth
-    project = get_object_or_404(Project, id=project_id)
+    project = get_object_or_404(Project.objects.select_related('created_by'), id=project_id)
     
     # Check if user is admin or project creator
     if not (user.is_admin or project.created_by == user):
@@ -137,10 +163,11 @@ def add_member(request, project_id: int, data: ProjectMemberIn):
 
 # Remove member from project
 @router.delete("/{project_id}/members/{user_id}", response=ProjectDetailOut, auth=auth)
+@query_budget(8)
 def remove_member(request, project_id: int, user_id: int):
     """Remove a member from the project"""
     user = request.auth
-    project = get_object_or_404(Project, id=project_id)
+    project = get_object_or_404(Project.objects.select_related('created_by'), id=project_id)
     
     # Check if user is admin or project creator
     if not (user.is_admin or project.created_by == user):
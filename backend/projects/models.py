@@ -1,5 +1,24 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.conf import settings
+from django.utils import timezone
+from backend.responsecache import invalidate
+
+class ProjectQuerySet(models.QuerySet):
+    """QuerySet for projects"""
+    
+    def update(self, **kwargs):
+        """
+        Update rows, bumping updated_at like Model.save() does
+        
+        Conditional GET validators of project and task lists are derived
+        from updated_at, so it has to move on every change. Cached
+        responses covering the projects are invalidated.
+        """
+        kwargs.setdefault('updated_at', timezone.now())
+        project_ids = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        invalidate(projects=project_ids, using=self.db)
+        return rows
 
 class Project(models.Model):
     """Project model for categorizing tasks"""
@@ -41,5 +60,21 @@ class Project(models.Model):
         blank=True
     )
     
+    objects = ProjectQuerySet.as_manager()
+    
+    def delete(self, using=None, keep_parents=False):
+        """
+        Delete the project after deleting its tasks as one queryset
+        
+        Tasks have delete signals, so the collector would load all of them
+        and delete them 100 at a time. TaskQuerySet.delete() takes a fixed
+        number of queries and leaves their tombstones. The project's rollup
+        groups are deleted with it, so they aren't counted down first.
+        """
+        using = using or router.db_for_write(Project, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            self.tasks.using(using).delete(rollup=False)
+            return super().delete(using=using, keep_parents=keep_parents)
+    
     def __str__(self):
         return self.name
\ No newline at end of file
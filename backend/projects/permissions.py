@@ -0,0 +1,71 @@
+"""
+Request-scoped project membership checks
+
+Task writes check several memberships: the caller in the task's project,
+the caller in a new project, the assignee in the project. The resolver
+loads the memberships of every user involved in one query, together with
+the project names and usernames needed to serialize the result, and
+answers all checks from memory for the rest of the request.
+"""
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from .models import Project
+
+User = get_user_model()
+
+class MembershipResolver:
+    """Project memberships of the caller and the users a request refers to"""
+
+    def __init__(self, user):
+        self.user = user
+        self._loaded_users = set()
+        self._memberships = set()  # (project_id, user_id)
+        self.project_names = {}
+        self.usernames = {}
+
+    def load(self, *user_ids):
+        """Load the memberships of the caller and the given users, once per user"""
+        missing = ({self.user.pk, *user_ids} - {None}) - self._loaded_users
+        if not missing:
+            return
+        rows = Project.members.through.objects.filter(user_id__in=missing).values_list(
+            'project_id', 'user_id', 'project__name', 'user__username'
+        )
+        for project_id, user_id, project_name, username in rows:
+            self._memberships.add((project_id, user_id))
+            self.project_names[project_id] = project_name
+            self.usernames[user_id] = username
+        self._loaded_users |= missing
+
+    def is_member(self, project_id, user_id) -> bool:
+        self.load(user_id)
+        return (project_id, user_id) in self._memberships
+
+    def can_use_project(self, project_id) -> bool:
+        """Whether the caller may add tasks to the project"""
+        return self.user.is_admin or self.is_member(project_id, self.user.pk)
+
+    def project(self, project_id) -> Project:
+        """
+        Project instance carrying the id and name
+
+        Projects the loaded users are members of need no query; others are
+        looked up, raising Http404 if they don't exist.
+        """
+        if project_id not in self.project_names:
+            name = Project.objects.filter(id=project_id).values_list('name', flat=True).first()
+            if name is None:
+                raise Http404("No Project matches the given query.")
+            self.project_names[project_id] = name
+        return Project(id=project_id, name=self.project_names[project_id])
+
+    def member(self, user_id):
+        """User instance carrying the id and username of a loaded member"""
+        return User(id=user_id, username=self.usernames[user_id])
+
+def get_resolver(request) -> MembershipResolver:
+    """The membership resolver of the request's user, created on first use"""
+    resolver = getattr(request, '_membership_resolver', None)
+    if resolver is None or resolver.user.pk != request.auth.pk:
+        resolver = request._membership_resolver = MembershipResolver(request.auth)
+    return resolver
@@ -0,0 +1,41 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from backend.responsecache import invalidate
+from .models import Project
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_responses_on_change(sender, instance, using=None, **kwargs):
+    """Invalidate cached responses covering a changed project"""
+    invalidate(projects=(instance.pk,), using=using)
+
+@receiver(m2m_changed, sender=Project.members.through)
+def touch_projects_on_membership_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Bump updated_at of projects whose members change
+    
+    Membership decides which projects and tasks a user sees, so the
+    project's updated_at doubles as the membership version in conditional
+    GET validators. Cached responses of the members are invalidated too.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        # Adding existing members or removing non-members changes nothing
+        project_ids = [instance.pk] if pk_set or action == 'pre_clear' else []
+        if action == 'pre_clear':
+            # project.members.clear(): the members are gone afterwards
+            user_ids = list(instance.members.values_list('pk', flat=True))
+        else:
+            user_ids = pk_set
+    elif action == 'pre_clear':
+        # user.projects.clear(): the affected projects are gone afterwards
+        project_ids = list(instance.projects.values_list('pk', flat=True))
+        user_ids = [instance.pk]
+    else:
+        project_ids = pk_set
+        user_ids = [instance.pk]
+    if project_ids:
+        # The update also invalidates cached responses of the projects
+        Project.objects.filter(pk__in=project_ids).update()
+        invalidate(users=user_ids, using=kwargs.get('using'))
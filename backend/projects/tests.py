@@ -1,3 +1,103 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from backend.testing import ApiTestCase
+from tasks.models import ProjectAccessChange, Task, TaskRollup, TaskTombstone
+from .models import Project
 
-# Create your tests here.
+User = get_user_model()
+
+class ProjectEndpointTests(ApiTestCase):
+    """Project endpoints within their query budgets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='alice', email='alice@example.com')
+        cls.admin = User.objects.create(username='root', email='root@example.com', role=User.ROLE_ADMIN)
+        cls.members = User.objects.bulk_create(
+            User(username=f'member-{i}', email=f'member-{i}@example.com') for i in range(5)
+        )
+        cls.outsider = User.objects.create(username='mallory', email='mallory@example.com')
+        cls.projects = Project.objects.bulk_create(
+            Project(name=f'Project {i}', created_by=cls.owner) for i in range(5)
+        )
+        cls.project = cls.projects[0]
+        for project in cls.projects:
+            project.members.add(cls.owner, *cls.members)
+        Task.objects.bulk_create(
+            Task(title=f'Task {i}', project=cls.project, created_by=cls.owner, assigned_to=cls.members[i % 5])
+            for i in range(30)
+        )
+
+    def test_get_project_stats(self):
+        response = self.api('get', '/projects/stats', user=self.owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total'], 5)
+
+    def test_list_projects(self):
+        response = self.api('get', '/projects/', user=self.owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 5)
+
+    def test_create_project(self):
+        response = self.api('post', '/projects/', user=self.owner, data={'name': 'Gemini'})
+        self.assertEqual(response.status_code, 200)
+        project = Project.objects.get(pk=response.json()['id'])
+        self.assertQuerySetEqual(project.members.all(), [self.owner])
+
+    def test_get_project(self):
+        response = self.api('get', f'/projects/{self.project.id}', user=self.members[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['members']), 6)
+
+    def test_update_project(self):
+        response = self.api('put', f'/projects/{self.project.id}', user=self.owner, data={'name': 'Artemis'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'Artemis')
+
+    def test_delete_project(self):
+        response = self.api('delete', f'/projects/{self.project.id}', user=self.owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Task.objects.filter(project_id=self.project.id).exists())
+        self.assertEqual(TaskTombstone.objects.filter(project_id=self.project.id).count(), 30)
+
+    def test_delete_project_with_many_tasks(self):
+        # Spread over more rollup groups than one batch of ROLLUP_BATCH_SIZE
+        assignees = User.objects.bulk_create(
+            User(username=f'assignee-{i}', email=f'assignee-{i}@example.com') for i in range(25)
+        )
+        Task.objects.bulk_create(
+            Task(
+                title=f'Extra {i}', project=self.project, created_by=self.owner,
+                assigned_to=assignees[i % 25], status=Task.STATUS_CHOICES[i // 25 % 3][0],
+                priority=Task.PRIORITY_CHOICES[i // 75 % 3][0],
+            )
+            for i in range(1000)
+        )
+        response = self.api('delete', f'/projects/{self.project.id}', user=self.owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(TaskTombstone.objects.filter(project_id=self.project.id).count(), 1030)
+        self.assertFalse(TaskRollup.objects.filter(project_id=self.project.id).exists())
+
+    def test_delete_project_with_many_members(self):
+        # More than one bulk_create batch on SQLite
+        crowd = User.objects.bulk_create(
+            User(username=f'crowd-{i}', email=f'crowd-{i}@example.com') for i in range(300)
+        )
+        self.project.members.add(*crowd)
+        response = self.api('delete', f'/projects/{self.project.id}', user=self.owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            ProjectAccessChange.objects.filter(project_id=self.project.id, granted=False).count(), 306
+        )
+
+    def test_add_member(self):
+        response = self.api(
+            'post', f'/projects/{self.project.id}/members', user=self.owner,
+            data={'user_id': self.outsider.id},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.outsider.id, [member['id'] for member in response.json()['members']])
+
+    def test_remove_member(self):
+        response = self.api('delete', f'/projects/{self.project.id}/members/{self.members[0].id}', user=self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(self.members[0].id, [member['id'] for member in response.json()['members']])
@@ -1,97 +1,162 @@
-from ninja import Router
-from django.shortcuts import get_object_or_404
+import io
+import logging
+from ninja import File
+from ninja.files import UploadedFile
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.http import HttpResponse, StreamingHttpResponse
 from django.contrib.auth import get_user_model
-from django.db.models import Q
-from .models import Task
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import Coalesce
+from .models import Task, TaskRollup
 from projects.models import Project
+from projects.permissions import get_resolver
 from django.utils import timezone
 from .schemas import (
-    TaskCreateIn, TaskUpdateIn, TaskOut, TaskListOut, TaskStatsOut
+    TaskCreateIn, TaskUpdateIn, TaskOut, TaskFieldsOut, TaskListOut, TaskStatsOut,
+    ErrorOut, TaskBulkIn, TaskBulkOut, TaskImportOut, TaskChangesOut
 )
-from users.auth import AuthBearer
+from .bulk import apply_bulk_changes
+from .export import EXPORT_CONTENT_TYPES, EXPORT_FORMATS, astream_tasks, stream_tasks
+from .fields import TASK_FIELDS, parse_fields, project, task_output
+from .importer import import_tasks
+from .search import matching, ranked
+from .sync import changed_tasks, decode_sync_token, is_expired, next_token, removed_task_ids
+from .utils import CURSOR_ORDERINGS, CURSOR_VALUES, encode_cursor, decode_cursor, cursor_filter
+from users.auth import AsyncAuthBearer, AuthBearer
+from backend.conditional import not_modified
+from backend.events import event_stream, get_broker, hub
+from backend.profiling import ProfiledRouter
+from backend.querycount import query_budget
+from backend.responsecache import cache_response
 from typing import Dict, List, Optional
 
+logger = logging.getLogger(__name__)
+
 User = get_user_model()
-router = Router()
+router = ProfiledRouter()
 auth = AuthBearer()
+async_auth = AsyncAuthBearer()
+
+# Page size limits for cursor pagination
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Most items a single /bulk request may contain
+MAX_BULK_ITEMS = 1000
 
 
 from datetime import datetime
 import pytz  # Make sure to import pytz
 
-@router.get("/stats", response=Dict, auth=auth)
-def get_task_stats(request):
-    """Get task statistics for the current user"""
-    user = request.auth
-    
-    # Base queryset - tasks the user has access to
-    if user.is_admin:
-        queryset = Task.objects.all()
-    else:
-        user_projects = user.projects.all()
-        queryset = Task.objects.filter(
-            Q(project__in=user_projects) | Q(assigned_to=user) | Q(created_by=user)
-        ).distinct()
-    
-    # Get counts by status - handle different formats
-    total = queryset.count()
-    
-    # For "done" status - try multiple formats
-    completed = queryset.filter(
-        Q(status__iexact="done") | 
-        Q(status__iexact="DONE") | 
-        Q(status="Done")
-    ).count()
-    
-    # For "in_progress" status - try multiple formats
-    in_progress = queryset.filter(
-        Q(status__iexact="in_progress") | 
-        Q(status__iexact="IN_PROGRESS") | 
-        Q(status="In Progress")
-    ).count()
-    
-    # For "todo" status - try multiple formats
-    todo = queryset.filter(
-        Q(status__iexact="todo") | 
-        Q(status__iexact="TODO") | 
-        Q(status="To Do")
-    ).count()
-    
-    # Get overdue tasks using UTC timezone
-    today = datetime.now(pytz.UTC).date()
-    overdue = queryset.filter(
-        due_date__lt=today
-    ).exclude(
-        Q(status__iexact="done") | 
-        Q(status__iexact="DONE") | 
-        Q(status="Done")
-    ).count()
-    
+# Dimensions /stats can break counts down by, mapped to the grouped columns
+STATS_GROUP_BY = {
+    "project": ("project_id", "project__name"),
+    "assignee": ("assigned_to_id", "assigned_to__username"),
+    "priority": ("priority",),
+}
+
+def _stats_aggregates(today):
+    """Conditional aggregates computing every status count in one pass"""
+    open_status = ~Q(status=Task.STATUS_DONE)
+    return {
+        "total": Count("id"),
+        "completed": Count("id", filter=Q(status=Task.STATUS_DONE)),
+        "inProgress": Count("id", filter=Q(status=Task.STATUS_IN_PROGRESS)),
+        "todo": Count("id", filter=Q(status=Task.STATUS_TODO)),
+        "overdue": Count("id", filter=Q(due_date__lt=today) & open_status),
+    }
+
+def _rollup_aggregates():
+    """Aggregates summing status counts from TaskRollup groups"""
+    def total(**kwargs):
+        return Coalesce(Sum("count", **kwargs), 0)
     return {
-        "total": total,
-        "completed": completed,
-        "inProgress": in_progress,
-        "todo": todo,
-        "overdue": overdue
+        "total": total(),
+        "completed": total(filter=Q(status=Task.STATUS_DONE)),
+        "inProgress": total(filter=Q(status=Task.STATUS_IN_PROGRESS)),
+        "todo": total(filter=Q(status=Task.STATUS_TODO)),
     }
 
+async def _stats_rows(queryset, columns, aggregates):
+    """Aggregate a queryset, grouped by the given columns if any"""
+    if not columns:
+        return [await queryset.aaggregate(**aggregates)]
+    grouped = queryset.values(*columns).annotate(**aggregates).order_by(*columns)
+    return [row async for row in grouped]
 
-# List tasks with filtering
-@router.get("/", response=TaskListOut, auth=auth)
-def list_tasks(
-    request,
-    project_id: Optional[int] = None,
-    status: Optional[str] = None,
-    priority: Optional[str] = None,
-    assigned_to_id: Optional[int] = None
-):
-    """List tasks with optional filtering"""
+async def _all_tasks_stats_rows(columns, today):
+    """
+    Stats rows over every task, read from TaskRollup
+
+    Status counts come from the rollup groups, so the cost depends on the
+    number of groups rather than tasks. Overdue depends on the current
+    date and is counted from open tasks with a past due date.
+    """
+    rows = await _stats_rows(TaskRollup.objects.all(), columns, _rollup_aggregates())
+    overdue_tasks = Task.objects.filter(due_date__lt=today).exclude(status=Task.STATUS_DONE)
+    overdue = {
+        tuple(row[column] for column in columns): row["overdue"]
+        for row in await _stats_rows(overdue_tasks, columns, {"overdue": Count("id")})
+    }
+    for row in rows:
+        row["overdue"] = overdue.get(tuple(row[column] for column in columns), 0)
+    if columns:
+        # Groups emptied by deletes or reassignment linger with a zero count
+        rows = [row for row in rows if row["total"]]
+    return rows
+
+def _today(request=None):
+    """Today's date in UTC, the day /stats counts tasks as overdue from"""
+    return datetime.now(pytz.UTC).date()
+
+@router.get("/stats", response={200: Dict, 400: ErrorOut}, auth=async_auth)
+@query_budget(3)
+# Overdue counts change at midnight without any write
+@cache_response(varies_with=_today)
+async def get_task_stats(request, group_by: Optional[str] = None):
+    """
+    Get task statistics for the current user
+
+    With `group_by` (project, assignee or priority) the response also
+    includes a `groups` list with the same counts per group, computed in
+    the same round-trip.
+    """
     user = request.auth
     
-    # Base queryset
-    queryset = Task.objects.all()
+    if group_by and group_by not in STATS_GROUP_BY:
+        return 400, {"error": f"group_by must be one of: {', '.join(STATS_GROUP_BY)}"}
+    
+    today = _today()
+    columns = STATS_GROUP_BY[group_by] if group_by else ()
+    
+    if user.is_admin:
+        # Admins see every task, which the rollup table already counts
+        rows = await _all_tasks_stats_rows(columns, today)
+    else:
+        queryset = Task.objects.visible_to(user)
+        rows = await _stats_rows(queryset, columns, _stats_aggregates(today))
+    
+    keys = ("total", "completed", "inProgress", "todo", "overdue")
+    if not group_by:
+        return 200, {key: rows[0][key] for key in keys}
     
-    # Apply filters
+    # The overall totals are summed from the groups
+    stats = {key: sum(row[key] for row in rows) for key in keys}
+    stats["groups"] = [
+        {
+            "key": row[columns[0]],
+            "label": row[columns[-1]],
+            **{key: row[key] for key in keys},
+        }
+        for row in rows
+    ]
+    return 200, stats
+
+
+def _filtered_tasks(user, project_id, status, priority, assigned_to_id):
+    """Tasks the user has access to, narrowed by the list filters"""
+    queryset = Task.objects.visible_to(user)
     if project_id:
         queryset = queryset.filter(project_id=project_id)
     if status:
@@ -100,40 +165,243 @@ def list_tasks(
         queryset = queryset.filter(priority=priority)
     if assigned_to_id:
         queryset = queryset.filter(assigned_to_id=assigned_to_id)
+    return queryset
+
+# List tasks with filtering
+@router.get("/", response={200: TaskListOut, 400: ErrorOut}, auth=async_auth)
+@query_budget(3)
+async def list_tasks(
+    request,
+    response: HttpResponse,
+    project_id: Optional[int] = None,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    assigned_to_id: Optional[int] = None,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    order_by: Optional[str] = None,
+    with_count: bool = False,
+    fields: Optional[str] = None
+):
+    """
+    List tasks with optional filtering
     
-    # Filter by user access
-    if not user.is_admin:
-        # User can see tasks in projects they're a member of
-        user_projects = user.projects.all()
+    `q` searches task titles and descriptions; matches are ordered by
+    relevance unless another `order_by` is given.
+    
+    Tasks are read as .values() rows with their related columns joined,
+    without building model instances. `fields` (e.g.
+    `id,title,status,priority`) limits each task to the listed fields, and
+    only their columns are read from the database.
+    
+    Passing `limit` or `cursor` switches to keyset pagination: tasks are
+    returned in a stable (order_by, id) order and `next_cursor` points at
+    the following page. The total count is only computed on request.
+    
+    Responses carry an ETag; a request with a matching If-None-Match gets
+    a 304 without the tasks being loaded, or for a page, without them
+    being serialized.
+    """
+    queryset = _filtered_tasks(request.auth, project_id, status, priority, assigned_to_id)
+    
+    q = q.strip() if q else None
+    order_by = order_by or ("relevance" if q else "updated_at")
+    if order_by not in CURSOR_ORDERINGS:
+        return 400, {"error": f"order_by must be one of: {', '.join(CURSOR_ORDERINGS)}"}
+    if order_by == "relevance" and not q:
+        return 400, {"error": "order_by=relevance requires q"}
+    fields = parse_fields(fields) if fields else TASK_FIELDS
+    if fields is None:
+        return 400, {"error": f"fields must be a comma-separated list of: {', '.join(TASK_FIELDS)}"}
+    if q:
+        queryset = ranked(matching(queryset, q), q)
+    
+    # Without pagination parameters return the full list as before
+    if cursor is None and limit is None:
+        # Version of the matching tasks: edits, creates and deletes move the
+        # latest updated_at or the count, project renames and membership
+        # changes move the projects' updated_at, and renaming an assignee
+        # or creator moves theirs
+        version = await queryset.aaggregate(
+            last_updated=Max("updated_at"),
+            project_updated=Max("project__updated_at"),
+            assignee_updated=Max("assigned_to__updated_at"),
+            creator_updated=Max("created_by__updated_at"),
+            total=Count("id"),
+        )
+        unchanged = not_modified(request, response, *version.values())
+        if unchanged:
+            return unchanged
+        if q:
+            queryset = queryset.order_by(*CURSOR_ORDERINGS[order_by])
+        return 200, {
+            "tasks": [task_output(row, fields) async for row in project(queryset, fields)],
+            "count": version["total"]
+        }
+    
+    limit = min(max(limit or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+    
+    count = await queryset.acount() if with_count else None
+    
+    if cursor:
+        position = decode_cursor(cursor)
+        if not position or position["order_by"] != order_by:
+            return 400, {"error": "Invalid cursor"}
         queryset = queryset.filter(
-            Q(project__in=user_projects) | Q(assigned_to=user) | Q(created_by=user)
+            cursor_filter(order_by, position["value"], position["id"])
         )
     
-    return {
-        "tasks": queryset,
-        "count": queryset.count()
+    # Fetch one extra row to know whether another page exists
+    page = project(
+        queryset.order_by(*CURSOR_ORDERINGS[order_by]), fields, CURSOR_VALUES[order_by], "updated_at"
+    )
+    rows = [row async for row in page[:limit + 1]]
+    # A page is versioned by the rows it loaded rather than the whole
+    # matching set: their updated_at moves on every edit, and the cursor
+    # and limit are part of the URL the ETag is built from
+    unchanged = not_modified(request, response, [tuple(row.values()) for row in rows], count)
+    if unchanged:
+        return unchanged
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(order_by, rows[-1])
+    tasks = [task_output(row, fields) for row in rows]
+    
+    return 200, {
+        "tasks": tasks,
+        "count": count,
+        "next_cursor": next_cursor
+    }
+
+# Tasks changed since the previous sync
+@router.get("/changes", response={200: TaskChangesOut, 400: ErrorOut, 410: ErrorOut}, auth=async_auth)
+@query_budget(6)
+async def task_changes(request, since: Optional[str] = None):
+    """
+    Get the tasks that changed since a previous sync
+    
+    Returns the visible tasks that were created or changed after `since`,
+    the ids of tasks to drop in `deleted` (deleted, moved away, or in a
+    project the user left), and the `next_since` token for the next call.
+    Without `since` every visible task is returned. A token older than the
+    tombstone retention gets a 410 and the client has to sync from scratch.
+    """
+    user = request.auth
+    started = timezone.now()
+    
+    watermark = None
+    if since:
+        watermark = decode_sync_token(since)
+        if watermark is None:
+            return 400, {"error": "Invalid since token"}
+        if is_expired(watermark):
+            return 410, {"error": "Sync token expired, sync again without since"}
+    
+    rows = project(changed_tasks(user, watermark).order_by("updated_at", "id"), TASK_FIELDS)
+    return 200, {
+        "tasks": [task_output(row, TASK_FIELDS) async for row in rows],
+        "deleted": await removed_task_ids(user, watermark) if watermark else [],
+        "next_since": next_token(started),
     }
 
+# Push task changes to the client
+@router.get("/events", response={501: ErrorOut}, auth=async_auth)
+@query_budget(2)
+async def task_events(request):
+    """
+    Stream task change events as Server-Sent Events
+    
+    The client gets `created`, `updated` and `deleted` events with the ids
+    of tasks it can see, and `access` events when it joins or leaves a
+    project; it then fetches the changes from /changes. Requires the ASGI
+    server, where an idle stream holds no thread; under WSGI the stream
+    would tie up a worker forever, so the request gets a 501.
+    """
+    if not isinstance(request, ASGIRequest):
+        return 501, {"error": "Task events need the ASGI server, poll /api/tasks/changes instead"}
+    user = request.auth
+    project_ids = [
+        project_id async for project_id in
+        Project.members.through.objects.filter(user_id=user.pk).values_list('project_id', flat=True)
+    ]
+    get_broker().start()
+    subscription = hub.subscribe(user.pk, user.is_admin, project_ids)
+    response = StreamingHttpResponse(event_stream(subscription), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop proxies like nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+# Export tasks
+@router.get("/export", response={400: ErrorOut}, auth=async_auth)
+@query_budget(1)
+async def export_tasks(
+    request,
+    format: str = "csv",
+    project_id: Optional[int] = None,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    assigned_to_id: Optional[int] = None,
+    fields: Optional[str] = None
+):
+    """
+    Stream tasks as CSV or NDJSON
+    
+    Takes the same filters and `fields` as list_tasks. Tasks are read in
+    chunks while the response is sent, so memory use does not grow with
+    the number of tasks; those queries run after the handler returns and
+    are not part of its query budget.
+    """
+    if format not in EXPORT_FORMATS:
+        return 400, {"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}
+    fields = parse_fields(fields) if fields else TASK_FIELDS
+    if fields is None:
+        return 400, {"error": f"fields must be a comma-separated list of: {', '.join(TASK_FIELDS)}"}
+    
+    queryset = _filtered_tasks(request.auth, project_id, status, priority, assigned_to_id)
+    # WSGI servers can only iterate a sync stream; Django would collect an
+    # async one into a list first
+    stream = astream_tasks if isinstance(request, ASGIRequest) else stream_tasks
+    response = StreamingHttpResponse(
+        stream(queryset, fields, format),
+        content_type=EXPORT_CONTENT_TYPES[format],
+    )
+    response["Content-Disposition"] = f'attachment; filename="tasks.{format}"'
+    return response
+
 # Create task
 @router.post("/", response=TaskOut, auth=auth)
+@query_budget(7)
 def create_task(request, data: TaskCreateIn):
-    """Create a new task"""
+    """
+    Create a new task
+    
+    The memberships of the caller and the assignee are loaded in one
+    query, which also provides the project and assignee shown in the
+    response.
+    """
     user = request.auth
+    memberships = get_resolver(request)
+    memberships.load(data.assigned_to_id)
     
     # Get project
-    project = get_object_or_404(Project, id=data.project_id)
+    project = memberships.project(data.project_id)
     
     # Check if user is a member of the project
-    if not (user.is_admin or project.members.filter(id=user.id).exists()):
+    if not memberships.can_use_project(project.id):
         return {"detail": "Permission denied"}
     
     # Get assigned user if provided
     assigned_to = None
     if data.assigned_to_id:
-        assigned_to = get_object_or_404(User, id=data.assigned_to_id)
         # Check if assigned user is a member of the project
-        if not project.members.filter(id=assigned_to.id).exists():
+        if not memberships.is_member(project.id, data.assigned_to_id):
+            get_object_or_404(User, id=data.assigned_to_id)
             return {"detail": "Assigned user is not a member of the project"}
+        assigned_to = memberships.member(data.assigned_to_id)
     
     # Create task
     task = Task.objects.create(
@@ -149,31 +417,98 @@ def create_task(request, data: TaskCreateIn):
     
     return task
 
+# Create, update and delete tasks in one request
+@router.post("/bulk", response={200: TaskBulkOut, 400: ErrorOut}, auth=auth)
+@query_budget(23)
+def bulk_tasks(request, data: TaskBulkIn):
+    """
+    Apply a batch of task creates, updates and deletes
+    
+    Items are checked with the same permissions as the single-task
+    endpoints. Valid items are written together in one transaction and
+    invalid ones are skipped; `results` reports the outcome of every item.
+    Updates only change the fields they include.
+    """
+    items = len(data.create) + len(data.update) + len(data.delete)
+    if items > MAX_BULK_ITEMS:
+        return 400, {"error": f"A bulk request may contain at most {MAX_BULK_ITEMS} items"}
+    
+    return 200, apply_bulk_changes(request.auth, data)
+
+# Import tasks from CSV
+@router.post("/import", response={200: TaskImportOut, 403: ErrorOut}, auth=auth)
+def import_tasks_csv(request, file: UploadedFile = File(...)):
+    """
+    Import tasks from an uploaded CSV file (admins only)
+    
+    The file is read as a stream and loaded in chunks, see tasks.importer
+    for the columns. Rows that fail validation are skipped and listed in
+    `errors` with their line number.
+    """
+    user = request.auth
+    if not user.is_admin:
+        return 403, {"error": "Only admins can import tasks"}
+    
+    def progress(totals):
+        logger.info(
+            "Task import by %s: %d rows read, %d imported, %d rejected",
+            user.username, totals["rows"], totals["imported"], totals["rejected"]
+        )
+    
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    return 200, import_tasks(text, user, progress=progress)
+
 # Get task details
-@router.get("/{task_id}", response=TaskOut, auth=auth)
-def get_task(request, task_id: int):
-    """Get task details"""
+@router.get("/{task_id}", response={200: TaskFieldsOut, 400: ErrorOut}, auth=async_auth)
+@query_budget(2)
+async def get_task(request, response: HttpResponse, task_id: int, fields: Optional[str] = None):
+    """
+    Get task details
+    
+    `fields` limits the task to the listed fields, as for list_tasks.
+    """
     user = request.auth
-    task = get_object_or_404(Task, id=task_id)
     
-    # Check if user has access to the task
-    if not user.is_admin:
-        project = task.project
-        if not (
-            project.members.filter(id=user.id).exists() or
-            task.assigned_to == user or
-            task.created_by == user
-        ):
-            return {"detail": "Not found"}
+    if fields:
+        fields = parse_fields(fields)
+        if fields is None:
+            return 400, {"error": f"fields must be a comma-separated list of: {', '.join(TASK_FIELDS)}"}
+        queryset = project(Task.objects.visible_to(user), fields, "updated_at")
+        row = await aget_object_or_404(queryset, id=task_id)
+        # Every loaded value is part of the version, updated_at covers the rest
+        unchanged = not_modified(request, response, *row.values())
+        if unchanged:
+            return unchanged
+        return 200, task_output(row, fields)
+    
+    # Tasks the user has no access to are reported as not found
+    task = await aget_object_or_404(Task.objects.visible_to(user).with_related(), id=task_id)
+    
+    # Skip serializing a task the client already has
+    unchanged = not_modified(
+        request, response,
+        task.updated_at,
+        task.project.name,
+        task.assigned_to.username if task.assigned_to else None,
+        task.created_by.username,
+    )
+    if unchanged:
+        return unchanged
     
     return task
 
 # Update task
 @router.put("/{task_id}", response=TaskOut, auth=auth)
+@query_budget(11)
 def update_task(request, task_id: int, data: TaskUpdateIn):
-    """Update task details"""
+    """
+    Update task details
+    
+    Besides the write, an update reads the task and, when it changes the
+    project or assignee, the memberships involved in one more query.
+    """
     user = request.auth
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(Task.objects.visible_to(user).with_related(), id=task_id)
     
     # Check if user has permission to update
     if not (user.is_admin or task.created_by == user or task.assigned_to == user):
@@ -198,21 +533,26 @@ def update_task(request, task_id: int, data: TaskUpdateIn):
     if data.priority:
         task.priority = data.priority
     
+    memberships = get_resolver(request)
+    if data.project_id or data.assigned_to_id:
+        memberships.load(data.assigned_to_id)
+    
     # Update project if provided
-    if data.project_id:
-        project = get_object_or_404(Project, id=data.project_id)
+    if data.project_id and data.project_id != task.project_id:
+        project = memberships.project(data.project_id)
         # Check if user has access to the new project
-        if not (user.is_admin or project.members.filter(id=user.id).exists()):
+        if not memberships.can_use_project(project.id):
             return {"detail": "Permission denied for the selected project"}
         task.project = project
     
     # Update assigned user if provided
     if data.assigned_to_id:
-        assigned_to = get_object_or_404(User, id=data.assigned_to_id)
         # Check if assigned user is a member of the project
-        if not task.project.members.filter(id=assigned_to.id).exists():
+        if not memberships.is_member(task.project_id, data.assigned_to_id):
+            get_object_or_404(User, id=data.assigned_to_id)
             return {"detail": "Assigned user is not a member of the project"}
-        task.assigned_to = assigned_to
+        if data.assigned_to_id != task.assigned_to_id:
+            task.assigned_to = memberships.member(data.assigned_to_id)
     elif data.assigned_to_id is None:
         # Explicitly set to None if null is provided
         task.assigned_to = None
@@ -222,10 +562,11 @@ def update_task(request, task_id: int, data: TaskUpdateIn):
 
 # Delete task
 @router.delete("/{task_id}", auth=auth)
+@query_budget(6)
 def delete_task(request, task_id: int):
     """Delete a task"""
     user = request.auth
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(Task.objects.visible_to(user), id=task_id)
     
     # Check if user has permission to delete
     if not (user.is_admin or task.created_by == user):
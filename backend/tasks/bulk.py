@@ -0,0 +1,197 @@
+"""
+Batch task changes for POST /api/tasks/bulk
+
+Each item of a batch is checked with the same rules as the single-task
+endpoints, but the tasks, projects and memberships the batch refers to are
+loaded in a few set-based queries up front instead of per item. Valid items
+are then written with bulk_create, bulk_update and one delete inside a
+single transaction. Invalid items are skipped and reported in the results.
+"""
+from django.db import transaction
+from django.utils import timezone
+from projects.models import Project
+from .models import Task
+
+# Task fields a bulk update may change
+UPDATE_FIELDS = (
+    'title', 'description', 'due_date', 'status', 'priority',
+    'project_id', 'assigned_to_id',
+)
+
+# Fields that are left unchanged when an update sends null
+NOT_NULL_FIELDS = {'title', 'description', 'status', 'priority', 'project_id'}
+
+def _result(op, index, task_id=None, error=None):
+    """Outcome of one item, as serialized by TaskBulkResultOut"""
+    return {"op": op, "index": index, "ok": error is None, "id": task_id, "error": error}
+
+class BulkContext:
+    """Rows a batch refers to, loaded once for every item"""
+    
+    def __init__(self, user, data):
+        self.user = user
+        
+        # Tasks to update or delete, limited to those the user can see
+        task_ids = [item.id for item in data.update] + list(data.delete)
+        self.tasks = Task.objects.visible_to(user).in_bulk(task_ids) if task_ids else {}
+        
+        project_ids = {item.project_id for item in data.create}
+        project_ids |= {item.project_id for item in data.update if item.project_id}
+        self.project_ids = set(
+            Project.objects.filter(id__in=project_ids).values_list('id', flat=True)
+        ) if project_ids else set()
+        
+        # Memberships of the user and of every assignee in the projects involved
+        member_project_ids = project_ids | {task.project_id for task in self.tasks.values()}
+        user_ids = {user.id} | {
+            item.assigned_to_id
+            for item in (*data.create, *data.update)
+            if item.assigned_to_id
+        }
+        self.memberships = set(
+            Project.members.through.objects.filter(
+                project_id__in=member_project_ids, user_id__in=user_ids
+            ).values_list('project_id', 'user_id')
+        ) if member_project_ids else set()
+    
+    def is_member(self, project_id, user_id):
+        return (project_id, user_id) in self.memberships
+    
+    def can_use_project(self, project_id):
+        return self.user.is_admin or self.is_member(project_id, self.user.id)
+
+def _check_create(context, item):
+    """Return the error preventing a create, if any"""
+    if item.project_id not in context.project_ids:
+        return "Project not found"
+    if not context.can_use_project(item.project_id):
+        return "Permission denied"
+    if item.assigned_to_id and not context.is_member(item.project_id, item.assigned_to_id):
+        return "Assigned user is not a member of the project"
+    return None
+
+def _update_changes(context, task, item):
+    """
+    Work out the field changes an update item makes to a task
+    
+    Only fields present in the item are changed. Sending null clears
+    due_date and assigned_to_id and is ignored for the other fields.
+    
+    Returns:
+        Tuple of (changes dict, error message or None)
+    """
+    user = context.user
+    if not (user.is_admin or task.created_by_id == user.id or task.assigned_to_id == user.id):
+        return {}, "Permission denied"
+    
+    changes = {
+        name: getattr(item, name)
+        for name in UPDATE_FIELDS
+        if name in item.model_fields_set
+        and (getattr(item, name) is not None or name not in NOT_NULL_FIELDS)
+    }
+    
+    # Assignees who didn't create the task can only change its status
+    if not (user.is_admin or task.created_by_id == user.id):
+        return {name: value for name, value in changes.items() if name == 'status'}, None
+    
+    project_id = changes.get('project_id', task.project_id)
+    if 'project_id' in changes:
+        if project_id not in context.project_ids:
+            return {}, "Project not found"
+        if not context.can_use_project(project_id):
+            return {}, "Permission denied for the selected project"
+    
+    assigned_to_id = changes.get('assigned_to_id')
+    if assigned_to_id and not context.is_member(project_id, assigned_to_id):
+        return {}, "Assigned user is not a member of the project"
+    return changes, None
+
+def apply_bulk_changes(user, data):
+    """
+    Validate and apply a batch of task creates, updates and deletes
+    
+    Args:
+        user: User making the changes
+        data: TaskBulkIn with the items to apply
+    
+    Returns:
+        Dict with per-item results and the number of tasks created,
+        updated and deleted
+    """
+    context = BulkContext(user, data)
+    results = []
+    
+    new_tasks = []
+    for index, item in enumerate(data.create):
+        error = _check_create(context, item)
+        result = _result("create", index, error=error)
+        results.append(result)
+        if error is None:
+            new_tasks.append((result, Task(
+                title=item.title,
+                description=item.description or "",
+                due_date=item.due_date,
+                status=item.status,
+                priority=item.priority,
+                project_id=item.project_id,
+                assigned_to_id=item.assigned_to_id,
+                created_by_id=user.id,
+            )))
+    
+    # A task may only be referenced once across updates and deletes
+    seen = set()
+    
+    updated_tasks = []
+    update_fields = set()
+    for index, item in enumerate(data.update):
+        task = context.tasks.get(item.id)
+        if task is None:
+            error = "Task not found"
+        elif item.id in seen:
+            error = "Task appears more than once in the batch"
+        else:
+            changes, error = _update_changes(context, task, item)
+        seen.add(item.id)
+        results.append(_result("update", index, item.id, error))
+        if error is None and changes:
+            for name, value in changes.items():
+                setattr(task, name, value)
+            updated_tasks.append(task)
+            update_fields.update(changes)
+    
+    deleted_ids = []
+    for index, task_id in enumerate(data.delete):
+        task = context.tasks.get(task_id)
+        if task is None:
+            error = "Task not found"
+        elif task_id in seen:
+            error = "Task appears more than once in the batch"
+        elif not (user.is_admin or task.created_by_id == user.id):
+            error = "Permission denied"
+        else:
+            error = None
+            deleted_ids.append(task_id)
+        seen.add(task_id)
+        results.append(_result("delete", index, task_id, error))
+    
+    with transaction.atomic():
+        if new_tasks:
+            Task.objects.bulk_create(task for _, task in new_tasks)
+            for result, task in new_tasks:
+                result["id"] = task.id
+        if updated_tasks:
+            # bulk_update doesn't touch auto_now fields
+            now = timezone.now()
+            for task in updated_tasks:
+                task.updated_at = now
+            Task.objects.bulk_update(updated_tasks, [*update_fields, 'updated_at'])
+        if deleted_ids:
+            Task.objects.filter(id__in=deleted_ids).delete()
+    
+    return {
+        "results": results,
+        "created": len(new_tasks),
+        "updated": len(updated_tasks),
+        "deleted": len(deleted_ids),
+    }
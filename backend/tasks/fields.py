@@ -0,0 +1,78 @@
+"""
+Sparse fieldsets for task responses
+
+`fields=id,title,status` limits a task response to the listed TaskOut
+fields. The projection is pushed down into SQL: tasks are loaded with
+.values() over just the columns those fields need, so description text and
+the joined project and user rows are only read when asked for.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+from .schemas import TaskFieldsOut
+
+# Related objects in task output, mapped to the attribute serialized
+# next to their id
+RELATED_FIELDS = {
+    "project": "name",
+    "assigned_to": "username",
+    "created_by": "username",
+}
+
+TASK_FIELDS = tuple(TaskFieldsOut.model_fields)
+
+def parse_fields(fields: str) -> Optional[List[str]]:
+    """
+    Parse a comma-separated `fields` parameter
+
+    Args:
+        fields: Requested TaskOut field names
+
+    Returns:
+        Field names in TaskOut order, always including id, or None if a
+        name is unknown
+    """
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if requested - set(TASK_FIELDS):
+        return None
+    requested.add("id")
+    return [name for name in TASK_FIELDS if name in requested]
+
+def field_columns(fields: Sequence[str]) -> List[str]:
+    """Return the .values() columns needed to serialize the given fields"""
+    columns = []
+    for name in fields:
+        if name in RELATED_FIELDS:
+            columns += [f"{name}_id", f"{name}__{RELATED_FIELDS[name]}"]
+        else:
+            columns.append(name)
+    return columns
+
+def project(queryset, fields: Sequence[str], *extra: str):
+    """
+    Load only the columns of the given fields
+
+    Args:
+        queryset: Task queryset, filtered and ordered
+        fields: Field names from parse_fields
+        extra: Further columns or annotations to load, e.g. for cursors
+
+    Returns:
+        Queryset of dicts to pass to task_output
+    """
+    columns = field_columns(fields)
+    columns += [column for column in extra if column not in columns]
+    return queryset.values(*columns)
+
+def task_output(row: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """Shape a row from project() like TaskOut, with only the given fields"""
+    output = {}
+    for name in fields:
+        if name in RELATED_FIELDS:
+            related_id = row[f"{name}_id"]
+            attribute = RELATED_FIELDS[name]
+            output[name] = None if related_id is None else {
+                "id": related_id,
+                attribute: row[f"{name}__{attribute}"],
+            }
+        else:
+            output[name] = row[name]
+    return output
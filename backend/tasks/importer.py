@@ -0,0 +1,229 @@
+"""
+Bulk CSV import of tasks
+
+Used by the import_tasks management command and POST /api/tasks/import.
+The CSV is read as a stream and handled in chunks of IMPORT_CHUNK_SIZE
+rows. For each chunk the projects, assignees and memberships it refers to
+are loaded in a few set-based queries, every row is validated against
+them, and the valid rows are written in one transaction: with COPY on
+Postgres, with bulk_create elsewhere. Rejected rows are collected with
+their line number and reason.
+
+Columns match the CSV export. Rows name their project by `project_id` or
+`project_name` and their assignee by `assigned_to_id` or
+`assigned_to_username`; other export columns (id, created_by, timestamps)
+are ignored and the importing user becomes the creator.
+"""
+import csv
+import io
+from collections import Counter
+from datetime import date
+from itertools import islice
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.utils import timezone
+from projects.models import Project
+from backend.events import publish
+from backend.responsecache import invalidate
+from .models import Task, TaskRollup
+
+User = get_user_model()
+
+# Rows validated and written per transaction
+IMPORT_CHUNK_SIZE = 5000
+
+# Task columns written by COPY, in order
+COPY_COLUMNS = (
+    'title', 'description', 'due_date', 'status', 'priority',
+    'project_id', 'assigned_to_id', 'created_by_id', 'created_at', 'updated_at',
+)
+
+STATUSES = {value for value, _ in Task.STATUS_CHOICES}
+PRIORITIES = {value for value, _ in Task.PRIORITY_CHOICES}
+TITLE_MAX_LENGTH = Task._meta.get_field('title').max_length
+
+def _int(value):
+    """Parse an optional integer reference, None if blank or invalid"""
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+class ImportContext:
+    """Projects, assignees and memberships one chunk refers to"""
+
+    def __init__(self, rows):
+        project_ids = {_int(row.get('project_id')) for row in rows} - {None}
+        project_names = {row.get('project_name') for row in rows if not row.get('project_id')} - {None, ''}
+        self.project_ids = set(
+            Project.objects.filter(id__in=project_ids).values_list('id', flat=True)
+        ) if project_ids else set()
+        # Names are not unique; a name shared by several projects is ambiguous
+        self.projects_by_name = {}
+        if project_names:
+            for project_id, name in Project.objects.filter(name__in=project_names).values_list('id', 'name'):
+                self.projects_by_name[name] = None if name in self.projects_by_name else project_id
+
+        user_ids = {_int(row.get('assigned_to_id')) for row in rows} - {None}
+        usernames = {row.get('assigned_to_username') for row in rows if not row.get('assigned_to_id')} - {None, ''}
+        self.user_ids = set(
+            User.objects.filter(id__in=user_ids).values_list('id', flat=True)
+        ) if user_ids else set()
+        self.users_by_name = dict(
+            User.objects.filter(username__in=usernames).values_list('username', 'id')
+        ) if usernames else {}
+
+        member_project_ids = self.project_ids | (set(self.projects_by_name.values()) - {None})
+        member_user_ids = self.user_ids | set(self.users_by_name.values())
+        self.memberships = set(
+            Project.members.through.objects.filter(
+                project_id__in=member_project_ids, user_id__in=member_user_ids
+            ).values_list('project_id', 'user_id')
+        ) if member_project_ids and member_user_ids else set()
+
+    def project_for(self, row):
+        """Return the row's project id, or an error message"""
+        if row.get('project_id'):
+            project_id = _int(row['project_id'])
+            return (project_id, None) if project_id in self.project_ids else (None, "Project not found")
+        name = row.get('project_name')
+        if not name:
+            return None, "Missing project_id or project_name"
+        if name not in self.projects_by_name:
+            return None, "Project not found"
+        if self.projects_by_name[name] is None:
+            return None, "Project name is ambiguous, use project_id"
+        return self.projects_by_name[name], None
+
+    def assignee_for(self, row):
+        """Return the row's assignee id (None if unassigned), or an error message"""
+        if row.get('assigned_to_id'):
+            user_id = _int(row['assigned_to_id'])
+            return (user_id, None) if user_id in self.user_ids else (None, "Assigned user not found")
+        username = row.get('assigned_to_username')
+        if not username:
+            return None, None
+        if username not in self.users_by_name:
+            return None, "Assigned user not found"
+        return self.users_by_name[username], None
+
+def _task_for(context, row, user, now):
+    """Build an unsaved Task from a CSV row, or return an error message"""
+    title = (row.get('title') or '').strip()
+    if not title:
+        return None, "Missing title"
+    if len(title) > TITLE_MAX_LENGTH:
+        return None, f"Title is longer than {TITLE_MAX_LENGTH} characters"
+    status = row.get('status') or Task.STATUS_TODO
+    if status not in STATUSES:
+        return None, f"Invalid status: {status}"
+    priority = row.get('priority') or Task.PRIORITY_MEDIUM
+    if priority not in PRIORITIES:
+        return None, f"Invalid priority: {priority}"
+    due_date = None
+    if row.get('due_date'):
+        try:
+            due_date = date.fromisoformat(row['due_date'])
+        except ValueError:
+            return None, f"Invalid due_date: {row['due_date']}"
+
+    project_id, error = context.project_for(row)
+    if error:
+        return None, error
+    assigned_to_id, error = context.assignee_for(row)
+    if error:
+        return None, error
+    if assigned_to_id and (project_id, assigned_to_id) not in context.memberships:
+        return None, "Assigned user is not a member of the project"
+
+    return Task(
+        title=title,
+        description=row.get('description') or '',
+        due_date=due_date,
+        status=status,
+        priority=priority,
+        project_id=project_id,
+        assigned_to_id=assigned_to_id,
+        created_by_id=user.id,
+        created_at=now,
+        updated_at=now,
+    ), None
+
+def _copy_tasks(tasks, using):
+    """
+    Insert tasks with Postgres COPY
+
+    COPY skips TaskQuerySet.bulk_create, so the rollup counts and cached
+    responses are updated and subscribers notified here.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for task in tasks:
+        values = (getattr(task, column) for column in COPY_COLUMNS)
+        writer.writerow('' if value is None else value for value in values)
+    buffer.seek(0)
+    with connections[using].cursor() as cursor:
+        cursor.copy_expert(
+            # Blank fields load as NULL, except for the empty descriptions
+            f"COPY tasks_task ({', '.join(COPY_COLUMNS)}) FROM STDIN "
+            f"WITH (FORMAT csv, FORCE_NOT_NULL (description))",
+            buffer,
+        )
+    TaskRollup.objects.using(using).apply(Counter(task.rollup_key() for task in tasks))
+    projects = {task.project_id for task in tasks}
+    users = {user_id for task in tasks for user_id in (task.assigned_to_id, task.created_by_id)}
+    invalidate(projects, users, using=using)
+    # COPY doesn't return the new ids
+    publish('created', None, projects, users, using=using)
+
+def import_tasks(file, user, chunk_size=IMPORT_CHUNK_SIZE, progress=None, using='default'):
+    """
+    Import tasks from a CSV text stream
+
+    Each chunk is committed on its own, so a failure part way through keeps
+    the chunks already loaded.
+
+    Args:
+        file: Text file object with a header row
+        user: Admin user recorded as the creator of the tasks
+        chunk_size: Rows validated and written per transaction
+        progress: Optional callable receiving the running totals after each chunk
+        using: Database alias to import into
+
+    Returns:
+        Dict with the number of rows read, imported and rejected, and an
+        `errors` list of {line, error} for the rejected rows
+    """
+    reader = csv.DictReader(file)
+    use_copy = connections[using].vendor == 'postgresql'
+    totals = {"rows": 0, "imported": 0, "rejected": 0, "errors": []}
+
+    while True:
+        # line_num is the last physical line of the row just read
+        rows = [(reader.line_num, row) for row in islice(reader, chunk_size)]
+        if not rows:
+            break
+        context = ImportContext([row for _, row in rows])
+        now = timezone.now()
+        tasks = []
+        for line, row in rows:
+            task, error = _task_for(context, row, user, now)
+            if error:
+                totals["errors"].append({"line": line, "error": error})
+            else:
+                tasks.append(task)
+
+        if tasks:
+            with transaction.atomic(using=using):
+                if use_copy:
+                    _copy_tasks(tasks, using)
+                else:
+                    Task.objects.using(using).bulk_create(tasks, batch_size=1000)
+
+        totals["rows"] += len(rows)
+        totals["imported"] += len(tasks)
+        totals["rejected"] += len(rows) - len(tasks)
+        if progress:
+            progress(totals)
+
+    return totals
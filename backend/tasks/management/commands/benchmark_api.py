@@ -0,0 +1,314 @@
+import json
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from backend.api import api
+from backend.querycount import QueryRecorder, recording
+from projects.models import Project
+from tasks.models import Task
+from users.utils import create_token
+
+User = get_user_model()
+
+class Scenarios:
+    """
+    One request per API route, run against the seeded dataset
+
+    Each method is named after the route's view function and returns
+    (method, path, options for the test client). Every call gets a fresh
+    counter so writes can use unique names.
+    """
+
+    def __init__(self, prefix):
+        self.admin = User.objects.filter(username__startswith=f"{prefix}-", role=User.ROLE_ADMIN).first()
+        # The busiest standard user, a member of the most projects
+        self.user = (
+            User.objects.filter(username__startswith=f"{prefix}-", role=User.ROLE_STANDARD)
+            .annotate(memberships=Count('projects')).order_by('-memberships').first()
+        )
+        if self.admin is None or self.user is None:
+            raise CommandError(f"No seeded users with the prefix '{prefix}'; run seed_data first.")
+        # Their largest project, and a user outside it
+        self.project = (
+            Project.objects.filter(members=self.user)
+            .annotate(size=Count('tasks')).order_by('-size').first()
+        )
+        # A task of theirs there, which they may edit and delete
+        self.task = Task.objects.filter(project=self.project, created_by=self.user).order_by('-id').first()
+        if self.task is None:
+            raise CommandError(f"{self.user.username} created no tasks in {self.project.name}; seed more tasks.")
+        self.outsider = User.objects.exclude(projects=self.project).exclude(pk=self.admin.pk).first()
+        self.counter = 0
+
+    def headers(self, user):
+        token = create_token(user.id, user.username, user.role, is_staff=user.is_staff)
+        return {'HTTP_AUTHORIZATION': f"Bearer {token}"}
+
+    def as_user(self, **options):
+        return {**self.headers(self.user), **options}
+
+    def as_admin(self, **options):
+        return {**self.headers(self.admin), **options}
+
+    def json(self, user, data):
+        return {**self.headers(user), 'data': json.dumps(data), 'content_type': 'application/json'}
+
+    # Users
+    def register(self):
+        name = f"benchmark-{time.time_ns()}-{self.counter}"
+        return 'post', '/api/auth/register', {'data': json.dumps({
+            'username': name, 'email': f"{name}@example.com",
+            'password': 'password', 'password_confirm': 'password',
+        }), 'content_type': 'application/json'}
+
+    def login(self):
+        return 'post', '/api/auth/login', {'data': json.dumps({
+            'email': self.user.email, 'password': 'password',
+        }), 'content_type': 'application/json'}
+
+    def refresh_token(self):
+        token = create_token(self.user.id, self.user.username, self.user.role, token_type='refresh')
+        return 'post', '/api/auth/refresh', {
+            'data': json.dumps({'refresh': token}), 'content_type': 'application/json',
+        }
+
+    def get_user_profile(self):
+        return 'get', '/api/auth/me', self.as_user()
+
+    # Projects
+    def get_project_stats(self):
+        return 'get', '/api/projects/stats', self.as_user()
+
+    def list_projects(self):
+        return 'get', '/api/projects/', self.as_user()
+
+    def create_project(self):
+        return 'post', '/api/projects/', self.json(self.user, {'name': f"Benchmark {self.counter}"})
+
+    def get_project(self):
+        return 'get', f"/api/projects/{self.project.id}", self.as_user()
+
+    def update_project(self):
+        return 'put', f"/api/projects/{self.project.id}", self.json(self.admin, {'name': f"Renamed {self.counter}"})
+
+    def delete_project(self):
+        return 'delete', f"/api/projects/{self.project.id}", self.as_admin()
+
+    def add_member(self):
+        return 'post', f"/api/projects/{self.project.id}/members", self.json(self.admin, {'user_id': self.outsider.id})
+
+    def remove_member(self):
+        return 'delete', f"/api/projects/{self.project.id}/members/{self.user.id}", self.as_admin()
+
+    # Tasks
+    def get_task_stats(self):
+        return 'get', '/api/tasks/stats', self.as_user(data={'group_by': 'project'})
+
+    def list_tasks(self):
+        return 'get', '/api/tasks/', self.as_user(data={'project_id': self.project.id})
+
+    def task_changes(self):
+        return 'get', '/api/tasks/changes', self.as_user()
+
+    def export_tasks(self):
+        return 'get', '/api/tasks/export', self.as_user(data={'project_id': self.project.id, 'format': 'ndjson'})
+
+    def create_task(self):
+        return 'post', '/api/tasks/', self.json(self.user, {
+            'title': f"Benchmark {self.counter}", 'project_id': self.project.id, 'assigned_to_id': self.user.id,
+        })
+
+    def bulk_tasks(self):
+        return 'post', '/api/tasks/bulk', self.json(self.user, {
+            'create': [{'title': f"Benchmark {self.counter}-{i}", 'project_id': self.project.id} for i in range(10)],
+            'update': [{'id': self.task.id, 'status': 'done'}],
+        })
+
+    def import_tasks_csv(self):
+        rows = "".join(f"Imported {self.counter}-{i},{self.project.id}\n" for i in range(100))
+        upload = SimpleUploadedFile('tasks.csv', f"title,project_id\n{rows}".encode(), 'text/csv')
+        return 'post', '/api/tasks/import', self.as_admin(data={'file': upload})
+
+    def get_task(self):
+        return 'get', f"/api/tasks/{self.task.id}", self.as_user()
+
+    def update_task(self):
+        return 'put', f"/api/tasks/{self.task.id}", self.json(self.user, {'status': 'in_progress'})
+
+    def delete_task(self):
+        return 'delete', f"/api/tasks/{self.task.id}", self.as_user()
+
+# Routes that can't be timed as a single request
+SKIPPED = {
+    'task_events': "an open-ended event stream",
+}
+
+def api_routes():
+    """(method, path, view function) of every operation registered on the API"""
+    routes = []
+    for prefix, router in api._routers:
+        for path, path_view in router.path_operations.items():
+            for operation in path_view.operations:
+                for method in operation.methods:
+                    routes.append((method, f"{prefix}{path}".replace('//', '/'), operation.view_func))
+    return routes
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+class Command(BaseCommand):
+    """Benchmark every API route through the Django test client"""
+
+    help = (
+        'Drive each route of the API against a seed_data dataset and record p50/p95 '
+        'latency, queries per request and allocations to a JSON baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per route')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per route first')
+        parser.add_argument('--prefix', default='seed', help='Username prefix used by seed_data')
+        parser.add_argument('--routes', help='Comma-separated view names to run, all by default')
+        parser.add_argument('--warm-cache', action='store_true', help='Keep the response cache between requests')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Baseline JSON file to compare the results against')
+
+    def handle(self, *args, **options):
+        # Lets the test client's 'testserver' host through ALLOWED_HOSTS
+        setup_test_environment()
+        try:
+            self.benchmark(options)
+        finally:
+            teardown_test_environment()
+
+    def benchmark(self, options):
+        scenarios = Scenarios(options['prefix'])
+        selected = set(options['routes'].split(',')) if options['routes'] else None
+        client = Client()
+        cache = caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+        results = {}
+        for method, path, view_func in api_routes():
+            name = view_func.__name__
+            if selected and name not in selected:
+                continue
+            if name in SKIPPED:
+                self.stdout.write(f"Skipping {name}: {SKIPPED[name]}")
+                continue
+            if not hasattr(scenarios, name):
+                self.stderr.write(self.style.WARNING(f"No scenario for {method} {path} ({name})"))
+                continue
+
+            def run():
+                if not options['warm_cache']:
+                    cache.clear()
+                scenarios.counter += 1
+                verb, url, kwargs = getattr(scenarios, name)()
+                return self.request(client, verb, url, kwargs, write=method != 'GET')
+
+            for _ in range(options['warmup']):
+                run()
+            latencies, queries, stream_queries = [], [], []
+            for _ in range(options['iterations']):
+                seconds, count, streamed, status = run()
+                latencies.append(seconds * 1000)
+                queries.append(count)
+                stream_queries.append(streamed)
+
+            tracemalloc.start()
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results[name] = {
+                'method': method,
+                'path': path,
+                'status': status,
+                'p50_ms': round(statistics.median(latencies), 3),
+                'p95_ms': round(percentile(latencies, 0.95), 3),
+                'queries': max(queries),
+                'stream_queries': max(stream_queries),
+                'query_budget': getattr(view_func, 'query_budget', None),
+                'peak_alloc_kib': round(peak / 1024, 1),
+            }
+            self.report(name, results[name])
+
+        baseline = {'iterations': options['iterations'], 'warm_cache': options['warm_cache'], 'routes': results}
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(baseline, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Wrote {options['output']}")
+        if options['compare']:
+            with open(options['compare']) as f:
+                before = json.load(f)['routes']
+            if selected:
+                before = {name: result for name, result in before.items() if name in selected}
+            self.compare(before, results)
+
+    def request(self, client, verb, url, kwargs, write):
+        """
+        Send one request and return its wall time, query counts and status
+
+        Streaming bodies are consumed inside the timing. Their queries are
+        counted apart from those run until the response is returned, which
+        are the ones query budgets cover. Writes run in a transaction that
+        is rolled back, so every iteration sees the same data.
+        """
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            if write:
+                stack.enter_context(transaction.atomic())
+            stack.enter_context(recording(recorder))
+            start = time.perf_counter()
+            response = getattr(client, verb)(url, **kwargs)
+            count = recorder.count
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - start
+            if write:
+                transaction.set_rollback(True)
+        if response.status_code >= 400:
+            raise CommandError(f"{verb.upper()} {url} returned {response.status_code}: {response.content[:200]!r}")
+        return elapsed, count, recorder.count - count, response.status_code
+
+    def report(self, name, result):
+        budget = result['query_budget']
+        over = budget is not None and result['queries'] > budget
+        line = (
+            f"{name:<20} p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+            f"{result['queries']:>3} queries  {result['peak_alloc_kib']:>9.1f} KiB"
+        )
+        if result['stream_queries']:
+            line += f"  +{result['stream_queries']} queries streaming"
+        self.stdout.write(self.style.WARNING(f"{line}  over budget {budget}") if over else line)
+
+    def compare(self, before, after):
+        """Print the change of each metric against a previous baseline"""
+        self.stdout.write(f"\n{'route':<20} {'p50':>10} {'p95':>10} {'queries':>10} {'alloc':>10}")
+        for name in sorted(set(before) | set(after)):
+            if name not in before or name not in after:
+                self.stdout.write(f"{name:<20} {'only in ' + ('new' if name in after else 'baseline'):>10}")
+                continue
+            old, new = before[name], after[name]
+
+            def change(key):
+                if not old[key]:
+                    return f"{new[key] - old[key]:+}"
+                return f"{(new[key] - old[key]) / old[key]:+.0%}"
+
+            queries = f"{new['queries'] - old['queries']:+d}"
+            self.stdout.write(
+                f"{name:<20} {change('p50_ms'):>10} {change('p95_ms'):>10} {queries:>10} {change('peak_alloc_kib'):>10}"
+            )
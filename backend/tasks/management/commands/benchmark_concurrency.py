@@ -0,0 +1,108 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+
+class Command(BaseCommand):
+    """Measure API throughput of a running server at several concurrency levels"""
+
+    help = (
+        'Send GET requests from N concurrent keep-alive clients to a running server '
+        'and report requests/sec, latency percentiles and errors per concurrency level'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Server base URL, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--token', required=True, help='Access token to send requests with')
+        parser.add_argument('--path', default='/api/tasks/?limit=50', help='Path to request')
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[50, 100, 250, 500],
+            help='Numbers of concurrent clients to run, one after the other',
+        )
+        parser.add_argument('--requests', type=int, default=20, help='Requests per client')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError("Only plain http:// URLs are supported.")
+        self.stdout.write(f"{'clients':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for concurrency in options['concurrency']:
+            stats = asyncio.run(self.run(url, options, concurrency))
+            self.stdout.write(
+                f"{concurrency:>8} {stats['rate']:>9.1f} {stats['p50']:>9.1f} "
+                f"{stats['p95']:>9.1f} {stats['p99']:>9.1f} {stats['errors']:>7}"
+            )
+
+    async def run(self, url, options, concurrency):
+        latencies = []
+        errors = 0
+        request = (
+            f"GET {options['path']} HTTP/1.1\r\n"
+            f"Host: {url.netloc}\r\n"
+            f"Authorization: Bearer {options['token']}\r\n"
+            f"Accept: application/json\r\n\r\n"
+        ).encode()
+
+        async def client():
+            nonlocal errors
+            reader = writer = None
+            for _ in range(options['requests']):
+                started = time.monotonic()
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+                    writer.write(request)
+                    await writer.drain()
+                    status, keep_alive = await self.read_response(reader)
+                except (OSError, ConnectionError, ValueError):
+                    errors += 1
+                    status, keep_alive = None, False
+                else:
+                    if status == 200:
+                        latencies.append((time.monotonic() - started) * 1000)
+                    else:
+                        errors += 1
+                # Sync gunicorn workers close the connection after each response
+                if not keep_alive and writer is not None:
+                    writer.close()
+                    reader = writer = None
+            if writer is not None:
+                writer.close()
+
+        started = time.monotonic()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+        latencies.sort()
+        def percentile(p):
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)] if latencies else 0
+        return {
+            'rate': len(latencies) / elapsed,
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'errors': errors,
+        }
+
+    @staticmethod
+    async def read_response(reader):
+        """Read one HTTP/1.1 response; return its status and whether the connection stays open"""
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("closed by server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await reader.readline()) not in (b'\r\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+
+        if headers.get('transfer-encoding') == 'chunked':
+            while size := int((await reader.readline()).split(b';')[0], 16):
+                await reader.readexactly(size + 2)
+            await reader.readline()
+        elif 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        else:
+            await reader.read()
+            return status, False
+        return status, headers.get('connection') != 'close'
@@ -0,0 +1,94 @@
+import time
+import tracemalloc
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from ninja.renderers import JSONRenderer
+from backend.renderers import FastJSONRenderer, orjson
+from projects.models import Project
+from tasks.fields import TASK_FIELDS, project, task_output
+from tasks.models import Task
+from tasks.schemas import TaskListOut
+
+User = get_user_model()
+
+def instance_path(queryset):
+    """Model instances serialized through TaskOut attribute access"""
+    tasks = list(queryset.with_related())
+    return TaskListOut.model_validate({"tasks": tasks, "count": len(tasks)}).model_dump()
+
+def values_path(queryset):
+    """.values() rows shaped into output dicts, as list_tasks does"""
+    tasks = [task_output(row, TASK_FIELDS) for row in project(queryset, TASK_FIELDS)]
+    return TaskListOut.model_validate({"tasks": tasks, "count": len(tasks)}).model_dump()
+
+class Command(BaseCommand):
+    """Compare task list serialization paths on a generated page of tasks"""
+
+    help = 'Time and trace allocations of task list serialization and rendering'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10_000, help='Tasks in the page')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per path, the best is reported')
+
+    def handle(self, *args, **options):
+        # The generated rows are rolled back afterwards
+        with transaction.atomic():
+            queryset = self.create_tasks(options['tasks'])
+            data = values_path(queryset)
+            paths = [
+                ("instances", lambda: instance_path(queryset)),
+                (".values() rows", lambda: values_path(queryset)),
+                ("json render", lambda: JSONRenderer().render(None, data, response_status=200)),
+            ]
+            if orjson:
+                paths.append(
+                    ("orjson render", lambda: FastJSONRenderer().render(None, data, response_status=200))
+                )
+            else:
+                self.stdout.write("orjson is not installed; skipping the orjson renderer.")
+
+            self.stdout.write(f"{'path':<16} {'best ms':>10} {'peak KiB':>10} {'blocks':>10}")
+            for name, run in paths:
+                seconds, peak, blocks = self.measure(run, options['repeat'])
+                self.stdout.write(
+                    f"{name:<16} {seconds * 1000:>10.1f} {peak / 1024:>10.0f} {blocks:>10}"
+                )
+            transaction.set_rollback(True)
+
+    def create_tasks(self, count):
+        """Create a project with `count` tasks and return a queryset over them"""
+        user = User.objects.create(username=f"benchmark-{time.time_ns()}")
+        project_ = Project.objects.create(name="Benchmark", created_by=user)
+        Task.objects.bulk_create(
+            Task(
+                title=f"Task {i}",
+                description="Benchmark task description. " * 8,
+                status=Task.STATUS_CHOICES[i % 3][0],
+                priority=Task.PRIORITY_CHOICES[i % 3][0],
+                project=project_,
+                assigned_to=user if i % 2 else None,
+                created_by=user,
+            )
+            for i in range(count)
+        )
+        return Task.objects.filter(project=project_).order_by('-updated_at', '-id')
+
+    def measure(self, run, repeat):
+        """Return the best wall time, and the peak memory and live blocks of one run"""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        result = run()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+        del result
+        return best, peak, blocks
@@ -0,0 +1,44 @@
+import csv
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from tasks.importer import IMPORT_CHUNK_SIZE, import_tasks
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    """Load tasks from a CSV file in chunks"""
+
+    help = 'Import tasks from a CSV file, reporting progress per chunk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row, in the task export format')
+        parser.add_argument('--user', required=True, help='Username of the admin creating the tasks')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Rows per transaction')
+        parser.add_argument('--errors', help='Write rejected rows (line, error) to this CSV file')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['user']).first()
+        if user is None or not user.is_admin:
+            raise CommandError(f"{options['user']} is not an admin user.")
+
+        def progress(totals):
+            self.stdout.write(
+                f"{totals['rows']} rows read, {totals['imported']} imported, "
+                f"{totals['rejected']} rejected"
+            )
+
+        with open(options['path'], newline='', encoding='utf-8-sig') as file:
+            totals = import_tasks(file, user, chunk_size=options['chunk_size'], progress=progress)
+
+        if options['errors']:
+            with open(options['errors'], 'w', newline='', encoding='utf-8') as report:
+                writer = csv.DictWriter(report, fieldnames=('line', 'error'))
+                writer.writeheader()
+                writer.writerows(totals['errors'])
+        else:
+            for error in totals['errors']:
+                self.stderr.write(f"line {error['line']}: {error['error']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {totals['imported']} of {totals['rows']} tasks, {totals['rejected']} rejected."
+        ))
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+
+class Command(BaseCommand):
+    """Hold many idle task event streams open against a running server"""
+
+    help = (
+        'Open N concurrent /api/tasks/events streams, keep them idle and report '
+        'how many stay connected and how many keepalives and events arrive'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Server base URL, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--token', required=True, help='Access token to connect with')
+        parser.add_argument('--connections', type=int, default=5000, help='Streams to open')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to hold them open')
+        parser.add_argument('--ramp', type=float, default=10, help='Seconds over which to open the streams')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError("Only plain http:// URLs are supported.")
+        stats = asyncio.run(self.run(url, options))
+        self.stdout.write(
+            f"{stats['connected']} of {options['connections']} streams connected, "
+            f"{stats['open']} still open after {options['duration']:.0f}s, "
+            f"{stats['failed']} failed"
+        )
+        self.stdout.write(
+            f"{stats['keepalives']} keepalives, {stats['events']} events received; "
+            f"connect time p50 {stats['p50']:.1f}ms, p99 {stats['p99']:.1f}ms"
+        )
+
+    async def run(self, url, options):
+        stats = {'connected': 0, 'open': 0, 'failed': 0, 'keepalives': 0, 'events': 0}
+        connect_times = []
+        deadline = time.monotonic() + options['ramp'] + options['duration']
+        request = (
+            f"GET /api/tasks/events HTTP/1.1\r\n"
+            f"Host: {url.netloc}\r\n"
+            f"Authorization: Bearer {options['token']}\r\n"
+            f"Accept: text/event-stream\r\n\r\n"
+        ).encode()
+
+        async def stream(delay):
+            await asyncio.sleep(delay)
+            started = time.monotonic()
+            try:
+                reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+                writer.write(request)
+                await writer.drain()
+                status = await reader.readline()
+                if b' 200 ' not in status:
+                    raise ConnectionError(status.decode(errors='replace').strip())
+                connect_times.append((time.monotonic() - started) * 1000)
+                stats['connected'] += 1
+                while time.monotonic() < deadline:
+                    line = await asyncio.wait_for(reader.readline(), deadline - time.monotonic())
+                    if not line:
+                        raise ConnectionError("closed by server")
+                    if line.startswith(b': keepalive'):
+                        stats['keepalives'] += 1
+                    elif line.startswith(b'event:'):
+                        stats['events'] += 1
+            except asyncio.TimeoutError:
+                pass
+            except (OSError, ConnectionError):
+                stats['failed'] += 1
+                return
+            stats['open'] += 1
+            writer.close()
+
+        connections = options['connections']
+        ramp = options['ramp']
+        await asyncio.gather(*(stream(ramp * i / connections) for i in range(connections)))
+
+        connect_times.sort()
+        def percentile(p):
+            return connect_times[min(int(len(connect_times) * p), len(connect_times) - 1)] if connect_times else 0
+        stats['p50'], stats['p99'] = percentile(0.5), percentile(0.99)
+        return stats
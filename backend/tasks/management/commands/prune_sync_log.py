@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tasks.sync import SYNC_RETENTION, prune
+
+class Command(BaseCommand):
+    """Delete delta sync tombstones and access changes past their retention"""
+    
+    help = 'Delete task tombstones and project access changes older than the sync retention'
+    
+    def handle(self, *args, **options):
+        removed = prune(timezone.now() - SYNC_RETENTION)
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} sync log rows."))
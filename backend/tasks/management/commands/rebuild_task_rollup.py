@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from tasks.models import TaskRollup
+
+class Command(BaseCommand):
+    """Rebuild or verify the TaskRollup table against the task table"""
+    
+    help = 'Rebuild the task rollup table, or verify it with --verify'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare stored rollups with the task table and report drift',
+        )
+    
+    def handle(self, *args, **options):
+        if not options['verify']:
+            TaskRollup.objects.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f"Rebuilt {TaskRollup.objects.count()} task rollup groups."
+            ))
+            return
+        
+        expected = TaskRollup.objects.compute()
+        stored = TaskRollup.objects.stored()
+        mismatched = {
+            key: (stored.get(key, 0), expected.get(key, 0))
+            for key in set(expected) | set(stored)
+            if stored.get(key, 0) != expected.get(key, 0)
+        }
+        
+        for (project_id, assigned_to_id, status, priority), (found, actual) in sorted(
+            mismatched.items(), key=str
+        ):
+            self.stdout.write(
+                f"project={project_id} assigned_to={assigned_to_id} status={status} "
+                f"priority={priority}: stored {found}, actual {actual}"
+            )
+        
+        if mismatched:
+            raise CommandError(
+                f"{len(mismatched)} task rollup groups are out of date; "
+                f"run rebuild_task_rollup to fix them."
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"All {len(expected)} task rollup groups are up to date."
+        ))
@@ -0,0 +1,148 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from projects.models import Project
+from tasks.models import Task
+
+User = get_user_model()
+
+# Rows inserted per bulk_create and per transaction
+BATCH_SIZE = 10_000
+
+WORDS = (
+    'review update fix deploy design test draft plan migrate document refactor '
+    'release sync invoice report client backend frontend api database onboarding '
+    'budget roadmap meeting feedback audit security mobile search export cleanup'
+).split()
+
+def zipf_weights(n, exponent):
+    """Cumulative Zipf weights for ranks 1..n"""
+    return list(accumulate(1 / rank ** exponent for rank in range(1, n + 1)))
+
+class Command(BaseCommand):
+    """Seed a synthetic dataset with realistic skew for benchmarks"""
+
+    help = (
+        'Create users, projects, memberships and tasks with bulk inserts. Project '
+        'sizes and assignees follow Zipf distributions: a few huge projects, many '
+        'small ones, and a few busy assignees.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--projects', type=int, default=200)
+        parser.add_argument('--tasks', type=int, default=100_000)
+        parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of project sizes and assignees')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable datasets')
+        parser.add_argument('--prefix', default='seed', help='Username prefix of the generated users')
+        parser.add_argument('--flush', action='store_true', help='Delete data from a previous run with the same prefix first')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        prefix = options['prefix']
+        seeded = User.objects.filter(username__startswith=f"{prefix}-")
+        if seeded.exists():
+            if not options['flush']:
+                raise CommandError(f"Users with the prefix '{prefix}' exist; pass --flush to replace them.")
+            # Tasks first, as querysets: cascading from their creators would
+            # load them all. The rollup groups of seeded projects go with
+            # the projects, so those tasks aren't counted down first.
+            with transaction.atomic():
+                Task.objects.filter(project__created_by__in=seeded).delete(rollup=False)
+                Task.objects.filter(created_by__in=seeded).delete()
+                seeded.delete()
+
+        started = time.monotonic()
+        users = self.create_users(prefix, options['users'])
+        projects = self.create_projects(rng, users, options['projects'])
+        members = self.create_memberships(rng, users, projects, options['skew'])
+        self.create_tasks(rng, projects, members, options['tasks'], options['skew'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users, {len(projects)} projects and {options['tasks']} tasks "
+            f"in {time.monotonic() - started:.1f}s."
+        ))
+
+    def create_users(self, prefix, count):
+        """Users sharing one password hash ("password"); the first is an admin"""
+        password = make_password('password')
+        users = User.objects.bulk_create(
+            (
+                User(
+                    username=f"{prefix}-{i}",
+                    email=f"{prefix}-{i}@example.com",
+                    password=password,
+                    role=User.ROLE_ADMIN if i == 0 else User.ROLE_STANDARD,
+                )
+                for i in range(count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        self.stdout.write(f"{len(users)} users")
+        return users
+
+    def create_projects(self, rng, users, count):
+        projects = Project.objects.bulk_create(
+            (
+                Project(name=f"Project {i} {rng.choice(WORDS)}", created_by=rng.choice(users))
+                for i in range(count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        self.stdout.write(f"{len(projects)} projects")
+        return projects
+
+    def create_memberships(self, rng, users, projects, skew):
+        """
+        Give project i roughly users / i**skew members, at least two
+
+        Returns a list of member ids per project, creator first.
+        """
+        Membership = Project.members.through
+        members = []
+        rows = []
+        for rank, project in enumerate(projects, start=1):
+            size = max(2, min(len(users), int(len(users) / rank ** skew)))
+            ids = {project.created_by_id} | {user.id for user in rng.sample(users, size - 1)}
+            ids = [project.created_by_id] + sorted(ids - {project.created_by_id})
+            members.append(ids)
+            rows.extend(Membership(project_id=project.id, user_id=user_id) for user_id in ids)
+        Membership.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        self.stdout.write(f"{len(rows)} memberships")
+        return members
+
+    def create_tasks(self, rng, projects, members, count, skew):
+        """Tasks spread over projects and assignees by Zipf weights"""
+        project_weights = zipf_weights(len(projects), skew)
+        assignee_weights = {}
+        today = timezone.now().date()
+        statuses = [Task.STATUS_TODO, Task.STATUS_IN_PROGRESS, Task.STATUS_DONE]
+        priorities = [Task.PRIORITY_LOW, Task.PRIORITY_MEDIUM, Task.PRIORITY_HIGH]
+
+        created = 0
+        while created < count:
+            batch = []
+            for index in rng.choices(range(len(projects)), cum_weights=project_weights, k=min(BATCH_SIZE, count - created)):
+                ids = members[index]
+                if len(ids) not in assignee_weights:
+                    assignee_weights[len(ids)] = zipf_weights(len(ids), skew)
+                assignee = rng.choices(ids, cum_weights=assignee_weights[len(ids)])[0]
+                batch.append(Task(
+                    title=f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} {created + len(batch)}",
+                    description=" ".join(rng.choices(WORDS, k=rng.randint(0, 60))),
+                    due_date=today + timedelta(days=rng.randint(-60, 90)) if rng.random() < 0.7 else None,
+                    status=rng.choices(statuses, weights=(5, 2, 3))[0],
+                    priority=rng.choices(priorities, weights=(3, 5, 2))[0],
+                    project_id=projects[index].id,
+                    assigned_to_id=assignee if rng.random() < 0.85 else None,
+                    created_by_id=rng.choice(ids),
+                ))
+            with transaction.atomic():
+                Task.objects.bulk_create(batch)
+            created += len(batch)
+            self.stdout.write(f"{created} of {count} tasks")
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-16 20:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_rollups(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskRollup = apps.get_model('tasks', 'TaskRollup')
+    db = schema_editor.connection.alias
+    groups = (
+        Task.objects.using(db)
+        .values('project_id', 'assigned_to_id', 'status', 'priority')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    TaskRollup.objects.using(db).bulk_create(TaskRollup(**group) for group in groups)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_project_status'),
+        ('tasks', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('priority', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_rollups', to='projects.project')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('assigned_to__isnull', False)), fields=('project', 'assigned_to', 'status', 'priority'), name='unique_task_rollup_group'), models.UniqueConstraint(condition=models.Q(('assigned_to__isnull', True)), fields=('project', 'status', 'priority'), name='unique_task_rollup_unassigned_group')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
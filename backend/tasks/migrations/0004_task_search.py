@@ -0,0 +1,32 @@
+from django.db import migrations
+
+from tasks.search import POSTGRES_INDEX_SQL, create_sqlite_index, drop_sqlite_index
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for sql in POSTGRES_INDEX_SQL:
+            schema_editor.execute(sql)
+    elif vendor == 'sqlite':
+        create_sqlite_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS task_search_vector_idx")
+        schema_editor.execute("ALTER TABLE tasks_task DROP COLUMN IF EXISTS search_vector")
+    elif vendor == 'sqlite':
+        drop_sqlite_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
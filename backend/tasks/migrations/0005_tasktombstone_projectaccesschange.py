@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2026-10-16 23:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectAccessChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField()),
+                ('project_id', models.BigIntegerField()),
+                ('granted', models.BooleanField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_id', 'created_at'], name='project_access_user_idx'), models.Index(fields=['created_at'], name='project_access_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('project_id', models.BigIntegerField()),
+                ('assigned_to_id', models.BigIntegerField(null=True)),
+                ('created_by_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='task_tombstone_created_idx')],
+            },
+        ),
+    ]
@@ -1,6 +1,191 @@
-from django.db import models
+from collections import Counter
+from functools import reduce
+from operator import or_
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models import Case, Count, F, Lookup, Q, Value, When
 from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.utils import timezone
 from projects.models import Project
+from backend.events import publish
+from backend.responsecache import invalidate
+
+# Task columns that identify a TaskRollup group
+ROLLUP_FIELDS = ('project_id', 'assigned_to_id', 'status', 'priority')
+
+# Rollup groups changed per UPDATE; SQLite rejects expression trees
+# deeper than 1000 and large OR/CASE statements plan poorly on Postgres
+ROLLUP_BATCH_SIZE = 200
+
+# Task columns that decide who can see a task, as stored in TaskTombstone
+SCOPE_FIELDS = ('id', 'project_id', 'assigned_to_id', 'created_by_id')
+
+
+class EqualsAny(Lookup):
+    """Postgres `lhs = ANY(array)` predicate"""
+    
+    lookup_name = 'any'
+    
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} = ANY({rhs})', (*lhs_params, *rhs_params)
+
+
+class TaskQuerySet(models.QuerySet):
+    """QuerySet for tasks with visibility filtering and rollup-aware bulk writes"""
+    
+    def visible_to(self, user):
+        """
+        Restrict to tasks the user can see
+        
+        Admins see every task. Other users see tasks in projects they are a
+        member of, plus tasks assigned to or created by them. Each of the
+        three conditions is answered from an index (the user's rows in the
+        membership table, then task.project_id, assigned_to_id and
+        created_by_id), so the cost follows the user's own projects rather
+        than the size of the task table.
+        """
+        if user.is_admin:
+            return self
+        member_projects = Project.members.through.objects.filter(
+            user_id=user.pk
+        ).values('project_id')
+        
+        if connections[self.db].vendor == 'postgresql':
+            from django.contrib.postgres.expressions import ArraySubquery
+            # Postgres can't turn an IN (subquery) inside an OR into an index
+            # scan; = ANY(ARRAY(subquery)) is evaluated once and lets the
+            # three conditions combine as a BitmapOr of index scans.
+            in_member_project = Q(EqualsAny(F('project_id'), ArraySubquery(member_projects)))
+        else:
+            in_member_project = Q(project_id__in=member_projects)
+        
+        return self.filter(
+            in_member_project | Q(assigned_to_id=user.pk) | Q(created_by_id=user.pk)
+        )
+    
+    def with_related(self):
+        """Join the project and users serialized with each task"""
+        return self.select_related('project', 'assigned_to', 'created_by').only(
+            *(field.name for field in Task._meta.concrete_fields),
+            'project__name', 'assigned_to__username', 'created_by__username',
+        )
+    
+    def rollup_counts(self):
+        """Return a Counter of task counts per rollup group"""
+        rows = self.order_by().values_list(*ROLLUP_FIELDS).annotate(n=Count('id'))
+        return Counter({tuple(row[:-1]): row[-1] for row in rows})
+    
+    def cache_scope(self):
+        """Return ids of the projects and users whose cached responses cover these tasks"""
+        projects, users = set(), set()
+        rows = self.order_by().values_list('project_id', 'assigned_to_id', 'created_by_id').distinct()
+        for project_id, assigned_to_id, created_by_id in rows:
+            projects.add(project_id)
+            users.update((assigned_to_id, created_by_id))
+        return projects, users
+    
+    def update(self, **kwargs):
+        """
+        Update rows and move their counts between rollup groups
+        
+        updated_at is bumped like Model.save() does, so conditional GET
+        validators see the change, and cached responses covering the rows
+        are invalidated. Moving tasks to another project or assignee leaves
+        tombstones for delta sync. Subscribers get an `updated` event.
+        """
+        kwargs.setdefault('updated_at', timezone.now())
+        field_names = {Task._meta.get_field(name).attname for name in kwargs}
+        if not field_names & set(ROLLUP_FIELDS):
+            projects, users = self.cache_scope()
+            rows = super().update(**kwargs)
+            invalidate(projects, users, using=self.db)
+            publish('updated', None, projects, users, using=self.db)
+            return rows
+        
+        moves = bool(field_names & {'project_id', 'assigned_to_id'})
+        with transaction.atomic(using=self.db, savepoint=False):
+            # Snapshot the affected rows, the update may change what self matches
+            scopes = list(self.order_by().values_list(*SCOPE_FIELDS))
+            affected = Task.objects.using(self.db).filter(pk__in=[task_id for task_id, *_ in scopes])
+            before = affected.rollup_counts()
+            if moves:
+                TaskTombstone.objects.using(self.db).copy_from(affected, deleted=False)
+            rows = super().update(**kwargs)
+            after = affected.rollup_counts()
+            deltas = Counter(after)
+            deltas.subtract(before)
+            TaskRollup.objects.using(self.db).apply(deltas)
+            if moves:
+                # Moved tasks are also seen through their new project and assignee
+                scopes += affected.values_list(*SCOPE_FIELDS)
+            projects = {project_id for _, project_id, *_ in scopes}
+            users = {user_id for _, _, *user_ids in scopes for user_id in user_ids}
+            invalidate(projects, users, using=self.db)
+            publish('updated', scopes, using=self.db)
+        return rows
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        """Insert rows and add them to their rollup groups"""
+        with transaction.atomic(using=self.db, savepoint=False):
+            created = super().bulk_create(objs, *args, **kwargs)
+            TaskRollup.objects.using(self.db).apply(
+                Counter(task.rollup_key() for task in created)
+            )
+            projects = {task.project_id for task in created}
+            users = {user_id for task in created for user_id in (task.assigned_to_id, task.created_by_id)}
+            invalidate(projects, users, using=self.db)
+            # Backends that don't return primary keys leave them unset
+            scopes = [tuple(getattr(task, field) for field in SCOPE_FIELDS) for task in created]
+            publish(
+                'created', None if any(task.pk is None for task in created) else scopes,
+                projects, users, using=self.db,
+            )
+        return created
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """
+        Update rows in batches
+        
+        Django runs each batch through update(), which moves the counts
+        between rollup groups; the instances then remember their new group.
+        """
+        objs = list(objs)
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        for obj in objs:
+            obj._loaded_rollup_key = obj.rollup_key()
+        return rows
+    
+    def delete(self, rollup=True):
+        """
+        Delete rows, remove them from their rollup groups and leave
+        tombstones for delta sync
+        
+        The counts are taken off per group here and the tombstones are
+        copied with one INSERT ... SELECT, so the post_delete receivers
+        would have nothing left to do. The rows are removed with a single
+        DELETE instead of being collected and deleted in chunks of 100;
+        nothing references a task, so there is nothing to cascade to and
+        no post_delete signal is sent.
+        
+        Args:
+            rollup: Whether to update the rollup groups; False when they
+                are about to be deleted too, e.g. with their project
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            counts = self.rollup_counts() if rollup else {}
+            scopes = list(self.order_by().values_list(*SCOPE_FIELDS))
+            TaskTombstone.objects.using(self.db).copy_from(self)
+            deleted = self._raw_delete(self.db)
+            TaskRollup.objects.using(self.db).apply(
+                {key: -count for key, count in counts.items()}
+            )
+            projects = {project_id for _, project_id, *_ in scopes}
+            users = {user_id for _, _, *user_ids in scopes for user_id in user_ids}
+            invalidate(projects, users, using=self.db)
+            publish('deleted', scopes, using=self.db)
+        return deleted, {Task._meta.label: deleted}
 
 class Task(models.Model):
     """Task model for the task management system"""
@@ -60,5 +245,288 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = TaskQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Board and stats filters
+            models.Index(fields=['project', 'status'], name='task_project_status_idx'),
+            models.Index(fields=['assigned_to', 'status'], name='task_assignee_status_idx'),
+            # Recent tasks and keyset pagination orderings
+            models.Index(fields=['-updated_at', '-id'], name='task_updated_idx'),
+            models.Index(fields=['due_date', 'id'], name='task_due_date_idx'),
+            # Overdue lookups only ever consider open tasks
+            models.Index(
+                fields=['due_date'],
+                condition=~Q(status='done'),
+                name='task_open_due_date_idx',
+            ),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the rollup group the row was loaded with"""
+        instance = super().from_db(db, field_names, values)
+        if not instance.get_deferred_fields() & set(ROLLUP_FIELDS):
+            instance._loaded_rollup_key = instance.rollup_key()
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """
+        Save in a transaction
+        
+        The pre_save signal locks the stored row to read its rollup group,
+        and the lock holds until post_save has moved the counts, so
+        concurrent saves of a task apply their deltas one after the other.
+        """
+        using = kwargs.get('using') or router.db_for_write(Task, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+    
+    def rollup_key(self):
+        """Return the TaskRollup group this task currently belongs to"""
+        return tuple(getattr(self, field) for field in ROLLUP_FIELDS)
+    
+    def __str__(self):
+        return self.title
+
+
+class TaskRollupQuerySet(models.QuerySet):
+    """QuerySet with helpers to maintain and rebuild task rollups"""
+    
+    def apply(self, deltas):
+        """
+        Add count deltas to rollup groups
+        
+        Groups are changed ROLLUP_BATCH_SIZE at a time: the existing groups
+        of a batch are updated in one statement and the missing ones are
+        inserted together, so the number of queries grows with the number
+        of batches rather than groups, and no statement outgrows the
+        database's expression limits.
+        
+        Args:
+            deltas: Mapping of rollup key tuples to count changes
+        """
+        deltas = [(key, delta) for key, delta in deltas.items() if delta]
+        for start in range(0, len(deltas), ROLLUP_BATCH_SIZE):
+            self._apply_batch(dict(deltas[start:start + ROLLUP_BATCH_SIZE]))
+    
+    def _apply_batch(self, deltas):
+        """Apply the deltas of up to ROLLUP_BATCH_SIZE groups"""
+        if not deltas:
+            return
+        groups = {key: Q(**dict(zip(ROLLUP_FIELDS, key))) for key in deltas}
+        updated = self.filter(reduce(or_, groups.values())).update(
+            count=F('count') + Case(
+                *(When(groups[key], then=Value(delta)) for key, delta in deltas.items()),
+                output_field=models.IntegerField(),
+            )
+        )
+        if updated == len(deltas):
+            return
+        
+        # Nothing to take away from a group that no longer exists, e.g. when
+        # its project is being deleted
+        missing = {key: delta for key, delta in deltas.items() if delta > 0}
+        if updated and missing:
+            existing = set(
+                self.filter(reduce(or_, (groups[key] for key in missing)))
+                .values_list(*ROLLUP_FIELDS)
+            )
+            missing = {key: delta for key, delta in missing.items() if key not in existing}
+        if not missing:
+            return
+        try:
+            with transaction.atomic(using=self.db):
+                self.bulk_create(
+                    self.model(count=delta, **dict(zip(ROLLUP_FIELDS, key)))
+                    for key, delta in missing.items()
+                )
+        except IntegrityError:
+            # Another writer created some of the groups concurrently
+            self._apply_batch(missing)
+    
+    def compute(self):
+        """Return rollup counts computed from the task table"""
+        return Task.objects.using(self.db).rollup_counts()
+    
+    def stored(self):
+        """Return rollup counts as currently stored"""
+        rows = self.exclude(count=0).values_list(*ROLLUP_FIELDS, 'count')
+        return Counter({tuple(row[:-1]): row[-1] for row in rows})
+    
+    def rebuild(self):
+        """Recompute every rollup group from the task table"""
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            self.bulk_create(
+                self.model(count=count, **dict(zip(ROLLUP_FIELDS, key)))
+                for key, count in self.compute().items()
+            )
+
+
+class TaskRollup(models.Model):
+    """Task counts per project, assignee, status and priority"""
+    
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='task_rollups'
+    )
+    assigned_to = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        null=True,
+        blank=True
+    )
+    status = models.CharField(max_length=20)
+    priority = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+    
+    objects = TaskRollupQuerySet.as_manager()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'assigned_to', 'status', 'priority'],
+                condition=Q(assigned_to__isnull=False),
+                name='unique_task_rollup_group',
+            ),
+            # NULLs never collide in a unique index, so unassigned groups
+            # need their own constraint
+            models.UniqueConstraint(
+                fields=['project', 'status', 'priority'],
+                condition=Q(assigned_to__isnull=True),
+                name='unique_task_rollup_unassigned_group',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.project_id}/{self.assigned_to_id}/{self.status}/{self.priority}: {self.count}"
+
+class TaskTombstoneQuerySet(models.QuerySet):
+    """QuerySet for tombstones"""
+    
+    def copy_from(self, tasks, deleted=True):
+        """
+        Record the tasks of a queryset with one INSERT ... SELECT
+        
+        bulk_create() would load every row first and, on SQLite, split
+        the insert by the 999 parameter limit. Returns the number of
+        tombstones written.
+        """
+        connection = connections[self.db]
+        fields = [
+            TaskTombstone._meta.get_field(name)
+            for name in ('task_id', 'project_id', 'assigned_to_id', 'created_by_id', 'deleted', 'created_at')
+        ]
+        try:
+            sql, params = tasks.order_by().values_list(*SCOPE_FIELDS).query.get_compiler(self.db).as_sql()
+        except EmptyResultSet:
+            return 0
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {connection.ops.quote_name(TaskTombstone._meta.db_table)} ({columns}) '
+                f'SELECT scope.*, %s, %s FROM ({sql}) scope',
+                (
+                    fields[-2].get_db_prep_save(deleted, connection),
+                    fields[-1].get_db_prep_save(timezone.now(), connection),
+                    *params,
+                ),
+            )
+            return cursor.rowcount
+
+
+class TaskTombstone(models.Model):
+    """
+    A task that was deleted, or moved to another project or assignee
+
+    Delta sync reports these to clients that could see the task before.
+    The task's visibility scope at that time is kept as plain ids, since
+    the task, project and users may be gone.
+    """
+    
+    task_id = models.BigIntegerField()
+    project_id = models.BigIntegerField()
+    assigned_to_id = models.BigIntegerField(null=True)
+    created_by_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    objects = TaskTombstoneQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='task_tombstone_created_idx'),
+        ]
+    
+    @classmethod
+    def for_tasks(cls, rows, deleted=True):
+        """Build tombstones from (id, project_id, assigned_to_id, created_by_id) rows"""
+        now = timezone.now()
+        return [
+            cls(
+                task_id=task_id, project_id=project_id, assigned_to_id=assigned_to_id,
+                created_by_id=created_by_id, deleted=deleted, created_at=now,
+            )
+            for task_id, project_id, assigned_to_id, created_by_id in rows
+        ]
+    
+    def __str__(self):
+        return f"{'deleted' if self.deleted else 'moved'} task {self.task_id}"
+
+
+class ProjectAccessChangeQuerySet(models.QuerySet):
+    """QuerySet for project access changes"""
+    
+    def copy_from(self, memberships, granted):
+        """
+        Record the rows of a Project.members.through queryset with one
+        INSERT ... SELECT
+        
+        Like TaskTombstoneQuerySet.copy_from(), for all members of a large
+        project at once. Returns the number of changes written.
+        """
+        connection = connections[self.db]
+        fields = [
+            ProjectAccessChange._meta.get_field(name)
+            for name in ('user_id', 'project_id', 'granted', 'created_at')
+        ]
+        try:
+            sql, params = memberships.order_by().values_list('user_id', 'project_id').query.get_compiler(self.db).as_sql()
+        except EmptyResultSet:
+            return 0
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {connection.ops.quote_name(ProjectAccessChange._meta.db_table)} ({columns}) '
+                f'SELECT membership.*, %s, %s FROM ({sql}) membership',
+                (
+                    fields[-2].get_db_prep_save(granted, connection),
+                    fields[-1].get_db_prep_save(timezone.now(), connection),
+                    *params,
+                ),
+            )
+            return cursor.rowcount
+
+
+class ProjectAccessChange(models.Model):
+    """A user joining or leaving a project, as seen by delta sync"""
+    
+    user_id = models.BigIntegerField()
+    project_id = models.BigIntegerField()
+    granted = models.BooleanField()
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    objects = ProjectAccessChangeQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'created_at'], name='project_access_user_idx'),
+            models.Index(fields=['created_at'], name='project_access_created_idx'),
+        ]
+    
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"user {self.user_id} {'joined' if self.granted else 'left'} project {self.project_id}"
@@ -1,4 +1,5 @@
 from ninja import Schema
+from pydantic import model_serializer
 from typing import Optional, List
 from datetime import date, datetime
 
@@ -23,6 +24,16 @@ class TaskUpdateIn(Schema):
     project_id: Optional[int] = None
     assigned_to_id: Optional[int] = None
 
+class TaskBulkUpdateIn(TaskUpdateIn):
+    """Schema for one update in a bulk request"""
+    id: int
+
+class TaskBulkIn(Schema):
+    """Schema for bulk task changes input"""
+    create: List[TaskCreateIn] = []
+    update: List[TaskBulkUpdateIn] = []
+    delete: List[int] = []
+
 # Output Schemas
 class TaskUserOut(Schema):
     """Schema for task user output"""
@@ -60,10 +71,73 @@ class TaskOut(Schema):
     def resolve_created_by(task):
         return task.created_by
 
+class TaskFieldsOut(Schema):
+    """
+    Schema for task output in read endpoints
+
+    Same fields as TaskOut. With a `fields` parameter only the requested
+    fields are loaded, and fields missing from the task are left out of
+    the output rather than sent as null.
+    """
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    due_date: Optional[date] = None
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    project: Optional[TaskProjectOut] = None
+    assigned_to: Optional[TaskUserOut] = None
+    created_by: Optional[TaskUserOut] = None
+    
+    @model_serializer(mode="wrap")
+    def _loaded_fields(self, handler):
+        data = handler(self)
+        return {name: value for name, value in data.items() if name in self.model_fields_set}
+
 class TaskListOut(Schema):
     """Schema for task list output"""
-    tasks: List[TaskOut]
-    count: int
+    tasks: List[TaskFieldsOut]
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+class TaskChangesOut(Schema):
+    """Schema for delta sync output"""
+    tasks: List[TaskFieldsOut]
+    deleted: List[int]
+    next_since: str
+
+class TaskBulkResultOut(Schema):
+    """Schema for the outcome of one item of a bulk request"""
+    op: str
+    index: int
+    ok: bool
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class TaskBulkOut(Schema):
+    """Schema for bulk task changes output"""
+    results: List[TaskBulkResultOut]
+    created: int
+    updated: int
+    deleted: int
+
+class TaskImportErrorOut(Schema):
+    """Schema for a CSV row rejected by an import"""
+    line: int
+    error: str
+
+class TaskImportOut(Schema):
+    """Schema for task import output"""
+    rows: int
+    imported: int
+    rejected: int
+    errors: List[TaskImportErrorOut]
+
+class ErrorOut(Schema):
+    """Schema for error responses"""
+    error: str
 
 
 # Add this new schema to your existing schemas.py file
@@ -0,0 +1,138 @@
+"""
+Full-text search over task titles and descriptions
+
+The search index lives outside the Task model and is created by migration
+0004_task_search for the database in use:
+
+- Postgres: a generated `search_vector` tsvector column (title weighted
+  above description) with a GIN index. Postgres keeps it up to date on
+  every write.
+- SQLite: an FTS5 external-content table `tasks_task_fts` kept in sync by
+  insert, update and delete triggers. Django rebuilds SQLite tables when a
+  later migration alters Task, which drops the triggers; such migrations
+  must recreate them (see create_sqlite_index).
+
+Other databases fall back to case-insensitive substring matching.
+"""
+import re
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+# Text search configuration of the Postgres index and queries
+SEARCH_CONFIG = 'english'
+
+FTS_TABLE = 'tasks_task_fts'
+
+POSTGRES_INDEX_SQL = [
+    f"""
+    ALTER TABLE tasks_task ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX task_search_vector_idx ON tasks_task USING GIN (search_vector)",
+]
+
+SQLITE_INDEX_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, description, content='tasks_task', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF title, description ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    # Index the rows that already exist
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+def create_sqlite_index(schema_editor):
+    """Create the FTS5 table and its triggers, replacing existing ones"""
+    drop_sqlite_index(schema_editor)
+    for sql in SQLITE_INDEX_SQL:
+        schema_editor.execute(sql)
+
+def drop_sqlite_index(schema_editor):
+    """Drop the FTS5 table and its triggers"""
+    for trigger in ('insert', 'delete', 'update'):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+def _fts5_query(q: str) -> str:
+    """Turn free text into an FTS5 query matching every word"""
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", q))
+
+def matching(queryset, q: str):
+    """
+    Restrict a task queryset to tasks matching a search query
+    
+    On Postgres `q` uses web search syntax ("quoted phrases", OR, -word);
+    elsewhere every word has to match.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchVectorField
+        vector = RawSQL('"tasks_task"."search_vector"', [], output_field=SearchVectorField())
+        query = SearchQuery(q, config=SEARCH_CONFIG, search_type='websearch')
+        return queryset.alias(search_vector=vector).filter(search_vector=query)
+    
+    if vendor == 'sqlite':
+        match = _fts5_query(q)
+        if not match:
+            return queryset.none()
+        matches = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        return queryset.filter(id__in=matches)
+    
+    words = re.findall(r"\w+", q)
+    if not words:
+        return queryset.none()
+    for word in words:
+        queryset = queryset.filter(Q(title__icontains=word) | Q(description__icontains=word))
+    return queryset
+
+def ranked(queryset, q: str):
+    """
+    Annotate tasks from matching() with a `rank`, higher for better matches
+    
+    Title matches weigh more than description matches.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        query = SearchQuery(q, config=SEARCH_CONFIG, search_type='websearch')
+        # ts_rank() returns real; as double precision the rank survives the
+        # round trip through a cursor's JSON number, so the boundary row of
+        # a page compares equal to it
+        return queryset.annotate(rank=Cast(SearchRank('search_vector', query), FloatField()))
+    
+    if vendor == 'sqlite':
+        # bm25() is lower for better matches
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, 2.0, 1.0) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = tasks_task.id",
+            [_fts5_query(q)],
+            output_field=FloatField(),
+        )
+        return queryset.annotate(rank=rank)
+    
+    return queryset.annotate(rank=Value(0.0, output_field=FloatField()))
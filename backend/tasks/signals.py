@@ -0,0 +1,184 @@
+from collections import Counter
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from projects.models import Project
+from backend.events import publish
+from backend.responsecache import invalidate
+from .models import (
+    ROLLUP_FIELDS, SCOPE_FIELDS, ProjectAccessChange, Task, TaskQuerySet, TaskRollup, TaskTombstone
+)
+
+@receiver(pre_save, sender=Task)
+def load_rollup_key_before_save(sender, instance, using=None, **kwargs):
+    """
+    Read and lock the stored rollup group of the task being saved
+    
+    The group the instance was loaded with may be stale when another save
+    got in between, so the counts move from the row as it is now. Task.save()
+    runs in a transaction that keeps the row locked until they have moved.
+    """
+    if instance.pk is None:
+        return
+    row = (
+        Task.objects.using(using).select_for_update()
+        .filter(pk=instance.pk).values_list(*ROLLUP_FIELDS).first()
+    )
+    instance._loaded_rollup_key = tuple(row) if row else None
+
+# Connected before update_rollup_on_save, which replaces _loaded_rollup_key
+@receiver(post_save, sender=Task)
+def invalidate_responses_on_save(sender, instance, using=None, **kwargs):
+    """Invalidate cached responses covering the task before and after the save"""
+    previous = getattr(instance, '_loaded_rollup_key', None)
+    previous_project_id, previous_assignee_id = previous[:2] if previous else (None, None)
+    invalidate(
+        projects=(instance.project_id, previous_project_id),
+        users=(instance.assigned_to_id, instance.created_by_id, previous_assignee_id),
+        using=using,
+    )
+
+# Connected before update_rollup_on_save, which replaces _loaded_rollup_key
+@receiver(post_save, sender=Task)
+def publish_event_on_save(sender, instance, created, using=None, **kwargs):
+    """Notify subscribers who could see the task before or after the save"""
+    previous = getattr(instance, '_loaded_rollup_key', None)
+    scopes = [tuple(getattr(instance, field) for field in SCOPE_FIELDS)]
+    if previous:
+        scopes.append((instance.pk, *previous[:2], instance.created_by_id))
+    publish('created' if created else 'updated', scopes, using=using)
+
+# Connected before update_rollup_on_save, which replaces _loaded_rollup_key
+@receiver(post_save, sender=Task)
+def leave_tombstone_on_move(sender, instance, created, using=None, **kwargs):
+    """Record the previous scope of a task moved to another project or assignee"""
+    previous = None if created else getattr(instance, '_loaded_rollup_key', None)
+    if previous is None or previous[:2] == (instance.project_id, instance.assigned_to_id):
+        return
+    project_id, assigned_to_id = previous[:2]
+    TaskTombstone.objects.using(using).bulk_create(TaskTombstone.for_tasks(
+        [(instance.pk, project_id, assigned_to_id, instance.created_by_id)], deleted=False
+    ))
+
+@receiver(post_save, sender=Task)
+def update_rollup_on_save(sender, instance, created, **kwargs):
+    """Move the saved task into its current rollup group"""
+    key = instance.rollup_key()
+    previous = None if created else getattr(instance, '_loaded_rollup_key', None)
+    
+    if previous != key:
+        deltas = Counter({key: 1})
+        if previous is not None:
+            deltas[previous] -= 1
+        TaskRollup.objects.apply(deltas)
+    instance._loaded_rollup_key = key
+
+def _deleted_set_wise(origin) -> bool:
+    """
+    Whether the tasks of a delete were already handled as one queryset
+    
+    TaskQuerySet.delete() takes care of rollups, cache invalidation,
+    tombstones and events itself, and deleting a project or a user runs
+    it for their tasks first. The collector still sends post_delete for
+    the task instances it loaded beforehand.
+    """
+    if isinstance(origin, TaskQuerySet):
+        return True
+    model = origin if isinstance(origin, type) else getattr(origin, 'model', type(origin))
+    return model is Project or model is get_user_model()
+
+@receiver(post_delete, sender=Task)
+def update_rollup_on_delete(sender, instance, origin=None, **kwargs):
+    """Remove the deleted task from its rollup group"""
+    if _deleted_set_wise(origin):
+        return
+    key = getattr(instance, '_loaded_rollup_key', None) or instance.rollup_key()
+    TaskRollup.objects.apply({key: -1})
+
+@receiver(post_delete, sender=Task)
+def invalidate_responses_on_delete(sender, instance, using=None, origin=None, **kwargs):
+    """Invalidate cached responses covering a deleted task"""
+    if _deleted_set_wise(origin):
+        return
+    invalidate(
+        projects=(instance.project_id,),
+        users=(instance.assigned_to_id, instance.created_by_id),
+        using=using,
+    )
+
+@receiver(post_delete, sender=Task)
+def leave_tombstone_on_delete(sender, instance, using=None, origin=None, **kwargs):
+    """Record a deleted task for delta sync"""
+    if _deleted_set_wise(origin):
+        return
+    scope = tuple(getattr(instance, field) for field in SCOPE_FIELDS)
+    TaskTombstone.objects.using(using).bulk_create(TaskTombstone.for_tasks([scope]))
+    publish('deleted', [scope], using=using)
+
+@receiver(pre_delete, sender=Project)
+def leave_tombstones_on_project_delete(sender, instance, using=None, **kwargs):
+    """Record the tasks and memberships a project deletion removes"""
+    tasks = list(Task.objects.using(using).filter(project=instance).values_list(*SCOPE_FIELDS))
+    TaskTombstone.objects.using(using).bulk_create(TaskTombstone.for_tasks(tasks))
+    memberships = Project.members.through.objects.using(using).filter(project=instance)
+    member_ids = list(memberships.values_list('user_id', flat=True))
+    ProjectAccessChange.objects.using(using).copy_from(memberships, granted=False)
+    if tasks:
+        publish('deleted', tasks, using=using)
+    for user_id in member_ids:
+        publish('access', projects=(instance.pk,), users=(user_id,), using=using, granted=False)
+
+@receiver(m2m_changed, sender=Project.members.through)
+def record_access_on_membership_change(sender, instance, action, reverse, pk_set, using=None, **kwargs):
+    """Record users joining and leaving projects for delta sync and push"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if action == 'pre_clear':
+        # The cleared members or projects are gone afterwards
+        related = instance.projects if reverse else instance.members
+        pk_set = set(related.values_list('pk', flat=True))
+    pairs = [(instance.pk, pk) if reverse else (pk, instance.pk) for pk in pk_set or ()]
+    ProjectAccessChange.objects.using(using).bulk_create(
+        ProjectAccessChange(user_id=user_id, project_id=project_id, granted=action == 'post_add')
+        for user_id, project_id in pairs
+    )
+    for user_id, project_id in pairs:
+        publish(
+            'access', projects=(project_id,), users=(user_id,), using=using,
+            granted=action == 'post_add',
+        )
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def delete_tasks_on_user_delete(sender, instance, using=None, **kwargs):
+    """
+    Delete the tasks a user created as one queryset before the user
+    
+    The cascade would otherwise update the rollup, leave a tombstone,
+    invalidate and publish once per task. The collector has loaded the
+    tasks by now and still deletes their pks afterwards, which finds
+    nothing; the post_delete receivers skip them.
+    """
+    Task.objects.using(using).filter(created_by=instance).delete()
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def move_rollup_on_user_delete(sender, instance, **kwargs):
+    """
+    Move counts of tasks assigned to a deleted user to the unassigned groups
+    
+    Deleting a user sets assigned_to to NULL on their tasks without going
+    through Task.save(), and the user's own rollup rows are removed by the
+    cascade. Tasks the user created are deleted by
+    delete_tasks_on_user_delete.
+    """
+    rows = (
+        Task.objects.filter(assigned_to=instance)
+        .exclude(created_by=instance)
+        .values_list('project_id', 'status', 'priority')
+        .annotate(n=Count('id'))
+    )
+    TaskRollup.objects.apply(
+        Counter({(project_id, None, status, priority): n for project_id, status, priority, n in rows})
+    )
+    invalidate(projects={project_id for project_id, *_ in rows}, using=kwargs.get('using'))
@@ -0,0 +1,106 @@
+"""
+Delta sync for GET /api/tasks/changes
+
+A client passes back the `next_since` token of its previous sync and gets
+the tasks it can see that changed since then, plus the ids of tasks it
+should drop: tasks that were deleted, moved out of its reach, or that it
+lost access to by leaving a project. Changes are found through the
+updated_at index and the TaskTombstone and ProjectAccessChange logs, so a
+sync costs in proportion to what changed rather than to the task table.
+
+Tokens carry a timestamp. Rows become visible when their transaction
+commits, which can be a little after the timestamp they carry, so the next
+sync starts SYNC_OVERLAP before the current one did. Clients therefore may
+see a change twice and must apply changes idempotently.
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+from django.db.models import Q
+from django.utils import timezone
+from .models import ProjectAccessChange, Task, TaskTombstone
+
+# How far back the next sync starts, to catch late commits
+SYNC_OVERLAP = timedelta(seconds=30)
+
+# How long tombstones and access changes are kept; older tokens need a full sync
+SYNC_RETENTION = timedelta(days=30)
+
+def encode_sync_token(since: datetime) -> str:
+    """Create an opaque sync token for a watermark"""
+    raw = json.dumps({"t": since.isoformat()}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_sync_token(token: str) -> Optional[datetime]:
+    """Decode a token created by encode_sync_token, None if invalid"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        since = datetime.fromisoformat(json.loads(base64.urlsafe_b64decode(padded.encode()))["t"])
+    except (ValueError, KeyError, TypeError):
+        return None
+    return since if timezone.is_aware(since) else None
+
+def is_expired(since: datetime) -> bool:
+    """Whether the logs may no longer cover everything after the watermark"""
+    return since < timezone.now() - SYNC_RETENTION
+
+def next_token(started: datetime) -> str:
+    """Token for the sync that follows one started at `started`"""
+    return encode_sync_token(started - SYNC_OVERLAP)
+
+def changed_tasks(user, since: Optional[datetime]):
+    """
+    Tasks the user can see that changed after the watermark
+
+    Tasks of projects the user joined since then are included even if they
+    did not change themselves. Without a watermark every visible task is
+    returned.
+    """
+    queryset = Task.objects.visible_to(user)
+    if since is None:
+        return queryset
+    joined = ProjectAccessChange.objects.filter(
+        user_id=user.pk, granted=True, created_at__gt=since
+    ).values('project_id')
+    return queryset.filter(Q(updated_at__gt=since) | Q(project_id__in=joined))
+
+async def removed_task_ids(user, since: datetime):
+    """
+    Ids of tasks the user could see before the watermark and no longer can
+
+    Candidates are tombstones the user was in scope of, and the remaining
+    tasks of projects the user left. Those still visible to the user, e.g.
+    tasks moved between two of the user's projects, are not reported.
+    """
+    tombstones = TaskTombstone.objects.filter(created_at__gt=since)
+    left = {
+        project_id async for project_id in ProjectAccessChange.objects.filter(
+            user_id=user.pk, granted=False, created_at__gt=since
+        ).values_list('project_id', flat=True)
+    }
+    if not user.is_admin:
+        # Projects the user is in now or left since the watermark
+        projects = Q(project_id__in=user.projects.values('pk')) | Q(project_id__in=left)
+        tombstones = tombstones.filter(
+            projects | Q(assigned_to_id=user.pk) | Q(created_by_id=user.pk)
+        )
+    candidates = {task_id async for task_id in tombstones.values_list('task_id', flat=True)}
+    if left:
+        candidates |= {
+            task_id async for task_id in
+            Task.objects.filter(project_id__in=left).values_list('id', flat=True)
+        }
+    if not candidates:
+        return []
+    visible = {
+        task_id async for task_id in
+        Task.objects.visible_to(user).filter(id__in=candidates).values_list('id', flat=True)
+    }
+    return sorted(candidates - visible)
+
+def prune(before: datetime):
+    """Delete log rows older than `before`, returning how many were removed"""
+    tombstones, _ = TaskTombstone.objects.filter(created_at__lt=before).delete()
+    access, _ = ProjectAccessChange.objects.filter(created_at__lt=before).delete()
+    return tombstones + access
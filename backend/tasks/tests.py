@@ -1,3 +1,386 @@
+import base64
+import json
+import re
+import tracemalloc
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from backend.testing import ApiTestCase
+from projects.models import Project
+from .models import Task, TaskRollup, TaskTombstone
+from .utils import decode_cursor
 
-# Create your tests here.
+User = get_user_model()
+
+class RollupTests(TestCase):
+    """TaskRollup counts follow task writes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='alice', email='alice@example.com')
+        cls.project = Project.objects.create(name='Apollo', created_by=cls.user)
+        cls.project.members.add(cls.user)
+
+    def assertRollupMatches(self):
+        self.assertEqual(TaskRollup.objects.stored(), TaskRollup.objects.compute())
+
+    def test_stale_instance_moves_counts_from_stored_row(self):
+        task = Task.objects.create(title='Launch', project=self.project, created_by=self.user)
+        first = Task.objects.get(pk=task.pk)
+        second = Task.objects.get(pk=task.pk)
+        first.status = Task.STATUS_DONE
+        first.save()
+        # Loaded before the first save, still in the todo group
+        second.priority = Task.PRIORITY_HIGH
+        second.save()
+        self.assertRollupMatches()
+
+    def test_bulk_changes_touching_many_groups(self):
+        users = User.objects.bulk_create(
+            User(username=f'user-{i}', email=f'user-{i}@example.com') for i in range(400)
+        )
+        tasks = Task.objects.bulk_create(
+            Task(title=f'Task {i}', project=self.project, created_by=self.user, assigned_to=user)
+            for i, user in enumerate(users)
+        )
+        self.assertRollupMatches()
+        Task.objects.filter(pk__in=[task.pk for task in tasks]).update(status=Task.STATUS_DONE)
+        self.assertRollupMatches()
+        Task.objects.filter(project=self.project).delete()
+        self.assertRollupMatches()
+
+    def test_user_delete_handles_tasks_as_a_set(self):
+        def delete_user_with(count):
+            author = User.objects.create(username=f'author-{count}', email=f'author-{count}@example.com')
+            Task.objects.bulk_create(
+                Task(title=f'Task {i}', project=self.project, created_by=author, assigned_to=self.user)
+                for i in range(count)
+            )
+            author_id = author.pk
+            with CaptureQueriesContext(connection) as context:
+                author.delete()
+            self.assertEqual(TaskTombstone.objects.filter(created_by_id=author_id).count(), count)
+            return len(context)
+
+        # Besides the set-wise delete, the collector deletes the task pks it
+        # loaded beforehand, 100 per statement, which find nothing left
+        self.assertEqual(delete_user_with(250), delete_user_with(50) + 2)
+        self.assertFalse(Task.objects.exists())
+        self.assertRollupMatches()
+
+
+class TaskEndpointTests(ApiTestCase):
+    """Task endpoints within their query budgets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='alice', email='alice@example.com')
+        cls.member = User.objects.create(username='bob', email='bob@example.com')
+        cls.outsider = User.objects.create(username='mallory', email='mallory@example.com')
+        cls.project = Project.objects.create(name='Apollo', created_by=cls.owner)
+        cls.other_project = Project.objects.create(name='Gemini', created_by=cls.owner)
+        for project in (cls.project, cls.other_project):
+            project.members.add(cls.owner, cls.member)
+        cls.tasks = Task.objects.bulk_create(
+            Task(
+                title=f'Task {i}', project=cls.project, created_by=cls.owner,
+                assigned_to=cls.member if i % 2 else None,
+                priority=(Task.PRIORITY_LOW, Task.PRIORITY_MEDIUM, Task.PRIORITY_HIGH)[i % 3],
+            )
+            for i in range(30)
+        )
+        cls.task = cls.tasks[0]
+
+    def test_get_task_stats(self):
+        response = self.api('get', '/tasks/stats', user=self.member)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total'], 30)
+
+    def test_get_task_stats_overdue_after_midnight(self):
+        today = datetime.now(timezone.utc).date()
+        Task.objects.filter(pk=self.task.pk).update(due_date=today)
+        self.assertEqual(self.api('get', '/tasks/stats', user=self.member).json()['overdue'], 0)
+        tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+        with mock.patch('tasks.api.datetime', wraps=datetime) as clock:
+            clock.now.return_value = tomorrow
+            response = self.api('get', '/tasks/stats', user=self.member)
+        self.assertEqual(response['X-Response-Cache'], 'miss')
+        self.assertEqual(response.json()['overdue'], 1)
+
+    def test_get_task_stats_grouped(self):
+        response = self.api('get', '/tasks/stats', user=self.member, data={'group_by': 'priority'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['groups']), 3)
+
+    def test_list_tasks(self):
+        response = self.api('get', '/tasks/', user=self.member)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 30)
+
+    def test_list_tasks_pages(self):
+        first = self.api('get', '/tasks/', user=self.member, data={'limit': 20}).json()
+        second = self.api(
+            'get', '/tasks/', user=self.member, data={'limit': 20, 'cursor': first['next_cursor']}
+        ).json()
+        self.assertIsNone(second['next_cursor'])
+        self.assertEqual(len({task['id'] for task in first['tasks'] + second['tasks']}), 30)
+
+    def test_list_tasks_etag_covers_usernames(self):
+        etag = self.api('get', '/tasks/', user=self.owner)['ETag']
+        self.member.username = 'robert'
+        self.member.save()
+        response = self.api('get', '/tasks/', user=self.owner, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        assignees = {task['assigned_to']['username'] for task in response.json()['tasks'] if task['assigned_to']}
+        self.assertEqual(assignees, {'robert'})
+
+    def test_list_tasks_search_pages(self):
+        # Equal ranks, so every page boundary is decided by the id
+        params, seen = {'q': 'task', 'limit': 7}, []
+        while True:
+            page = self.api('get', '/tasks/', user=self.member, data=params).json()
+            seen += [task['id'] for task in page['tasks']]
+            if not page['next_cursor']:
+                break
+            params['cursor'] = page['next_cursor']
+        self.assertEqual(sorted(seen), sorted(task.id for task in self.tasks))
+
+    def test_list_tasks_rejects_bad_cursors(self):
+        payloads = [
+            {'o': 'updated_at', 'v': None, 'id': 1},
+            {'o': 'updated_at', 'v': 5, 'id': 1},
+            {'o': 'updated_at', 'v': '2024-01-01T00:00:00+00:00', 'id': '1'},
+            {'o': 'due_date', 'v': ['2024-01-01'], 'id': 1},
+            {'o': 'relevance', 'v': 'nan', 'id': 1},
+            {'o': 'relevance', 'v': None, 'id': 1},
+        ]
+        for payload in payloads:
+            with self.subTest(payload):
+                cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+                response = self.api(
+                    'get', '/tasks/', user=self.member,
+                    data={'limit': 10, 'cursor': cursor, 'order_by': payload['o'], 'q': 'Task'},
+                )
+                self.assertEqual(response.status_code, 400)
+        # Tasks without a due date sort last, so null is a valid position there
+        self.assertIsNotNone(decode_cursor(
+            base64.urlsafe_b64encode(b'{"o":"due_date","v":null,"id":1}').decode()
+        ))
+
+    def test_list_tasks_page_etag(self):
+        params = {'limit': 10, 'fields': 'id,title'}
+        first = self.api('get', '/tasks/', user=self.member, data=params)
+        self.assertEqual(first['X-DB-Query-Count'], '2')
+        unchanged = self.api('get', '/tasks/', user=self.member, data=params, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(unchanged.status_code, 304)
+        Task.objects.filter(pk=first.json()['tasks'][0]['id']).update(title='Renamed')
+        changed = self.api('get', '/tasks/', user=self.member, data=params, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(changed.status_code, 200)
+
+    def test_list_tasks_hides_other_projects(self):
+        response = self.api('get', '/tasks/', user=self.outsider)
+        self.assertEqual(response.json()['count'], 0)
+
+    def test_task_changes(self):
+        first = self.api('get', '/tasks/changes', user=self.member).json()
+        self.assertEqual(len(first['tasks']), 30)
+        Task.objects.filter(pk=self.task.pk).delete()
+        response = self.api('get', '/tasks/changes', user=self.member, data={'since': first['next_since']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['deleted'], [self.task.pk])
+
+    def test_export_tasks(self):
+        response = self.api('get', '/tasks/export', user=self.member, data={'fields': 'id,title'})
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response).decode().splitlines()
+        self.assertEqual(lines[0], 'id,title')
+        self.assertEqual(len(lines), 31)
+
+    async def test_export_tasks_asgi(self):
+        response = await self.async_client.get(
+            '/api/tasks/export', {'format': 'ndjson'}, headers=self.auth_headers(self.member)
+        )
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body.splitlines()), 30)
+
+    def test_task_events_need_asgi(self):
+        response = self.api('get', '/tasks/events', user=self.member)
+        self.assertEqual(response.status_code, 501)
+
+    def test_create_task(self):
+        response = self.api('post', '/tasks/', user=self.member, data={
+            'title': 'Launch', 'project_id': self.project.id, 'assigned_to_id': self.owner.id,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['assigned_to']['id'], self.owner.id)
+
+    def test_bulk_tasks(self):
+        response = self.api('post', '/tasks/bulk', user=self.owner, data={
+            'create': [{'title': f'New {i}', 'project_id': self.project.id} for i in range(10)],
+            'update': [{'id': task.id, 'status': Task.STATUS_DONE} for task in self.tasks[:10]],
+            'delete': [task.id for task in self.tasks[10:20]],
+        })
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['created'], body['updated'], body['deleted']), (10, 10, 10))
+
+    def test_get_task(self):
+        response = self.api('get', f'/tasks/{self.task.id}', user=self.member)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['project']['name'], 'Apollo')
+
+    def test_get_task_fields(self):
+        response = self.api('get', f'/tasks/{self.task.id}', user=self.member, data={'fields': 'id,title'})
+        self.assertEqual(response.json(), {'id': self.task.id, 'title': 'Task 0'})
+
+    def test_update_task(self):
+        response = self.api('put', f'/tasks/{self.task.id}', user=self.owner, data={
+            'title': 'Moved', 'project_id': self.other_project.id, 'assigned_to_id': self.member.id,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['project']['id'], self.other_project.id)
+
+    def test_delete_task(self):
+        response = self.api('delete', f'/tasks/{self.task.id}', user=self.owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Task.objects.filter(pk=self.task.pk).exists())
+
+
+class QueryPlanTests(TestCase):
+    """Hot task queries are answered from their indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='alice', email='alice@example.com')
+        cls.project = Project.objects.create(name='Apollo', created_by=cls.user)
+        cls.project.members.add(cls.user)
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            # The test tables are tiny; only a missing index should make
+            # Postgres fall back to a sequential scan
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                return queryset.explain()
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index):
+        plan = self.explain(queryset)
+        self.assertIn(index, plan)
+        self.assertNoTableScan(plan)
+
+    def assertNoTableScan(self, plan):
+        self.assertNotIn('Seq Scan on tasks_task', plan)
+        self.assertIsNone(re.search(r'SCAN tasks_task(?! USING)', plan), plan)
+
+    def test_board_filters(self):
+        self.assertUsesIndex(Task.objects.filter(project=self.project, status=Task.STATUS_TODO), 'task_project_status_idx')
+        self.assertUsesIndex(Task.objects.filter(assigned_to=self.user, status=Task.STATUS_TODO), 'task_assignee_status_idx')
+
+    def test_keyset_orderings(self):
+        self.assertUsesIndex(Task.objects.order_by('-updated_at', '-id')[:50], 'task_updated_idx')
+        self.assertUsesIndex(Task.objects.order_by('due_date', 'id')[:50], 'task_due_date_idx')
+
+    def test_overdue_tasks(self):
+        overdue = Task.objects.filter(due_date__lt=date.today()).exclude(status=Task.STATUS_DONE)
+        self.assertUsesIndex(overdue, 'task_open_due_date_idx')
+
+    def test_visible_tasks(self):
+        self.assertNoTableScan(self.explain(Task.objects.visible_to(self.user)))
+
+
+class QueryCountTests(ApiTestCase):
+    """Read endpoints run the same queries however many rows they return"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='alice', email='alice@example.com')
+
+    def add_rows(self, count):
+        """Add projects with a member each, one task assigned to them and deletions"""
+        first = User.objects.count()
+        users = User.objects.bulk_create(
+            User(username=f'user-{i}', email=f'user-{i}@example.com') for i in range(first, first + count)
+        )
+        projects = Project.objects.bulk_create(
+            Project(name=f'Project {user.username}', created_by=user) for user in users
+        )
+        for project, user in zip(projects, users):
+            project.members.add(self.owner, user)
+        Task.objects.bulk_create(
+            Task(title=f'Task {user.username}', project=project, created_by=user, assigned_to=user,
+                 due_date=date.today() - timedelta(days=1))
+            for project, user in zip(projects, users)
+        )
+        Task.objects.filter(project__in=projects[:count // 2]).delete()
+        return projects
+
+    def queries(self, path, data=None):
+        self.clear_response_cache()
+        response = self.api('get', path, user=self.owner, data=data)
+        self.assertEqual(response.status_code, 200)
+        return int(response['X-DB-Query-Count'])
+
+    def assertConstantQueries(self, path, data=None):
+        self.add_rows(2)
+        few = self.queries(path, data)
+        self.add_rows(20)
+        self.assertEqual(self.queries(path, data), few)
+
+    def test_list_tasks(self):
+        self.assertConstantQueries('/tasks/')
+
+    def test_list_task_page(self):
+        self.assertConstantQueries('/tasks/', {'limit': 100, 'with_count': True})
+
+    def test_task_stats(self):
+        self.assertConstantQueries('/tasks/stats', {'group_by': 'assignee'})
+
+    def test_task_changes(self):
+        since = self.api('get', '/tasks/changes', user=self.owner).json()['next_since']
+        self.assertConstantQueries('/tasks/changes', {'since': since})
+
+    def test_list_projects(self):
+        self.assertConstantQueries('/projects/')
+
+    def test_get_project(self):
+        project = self.add_rows(1)[0]
+        few = self.queries(f'/projects/{project.id}')
+        others = self.add_rows(20)
+        project.members.add(*(other.created_by for other in others))
+        self.assertEqual(self.queries(f'/projects/{project.id}'), few)
+
+
+class ExportMemoryTests(ApiTestCase):
+    """Exports hold one chunk of rows at a time"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='alice', email='alice@example.com')
+        cls.project = Project.objects.create(name='Apollo', created_by=cls.owner)
+        cls.project.members.add(cls.owner)
+
+    def peak_memory(self, tasks):
+        """Peak Python allocations while reading an NDJSON export of `tasks` tasks"""
+        Task.objects.bulk_create(
+            Task(title=f'Task {i}', description='x' * 100, project=self.project, created_by=self.owner)
+            for i in range(tasks - Task.objects.count())
+        )
+        response = self.api('get', '/tasks/export', user=self.owner, data={'format': 'ndjson'})
+        tracemalloc.start()
+        try:
+            lines = sum(chunk.count(b'\n') for chunk in response)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(lines, tasks)
+        return peak
+
+    @mock.patch('tasks.export.EXPORT_CHUNK_SIZE', 100)
+    def test_memory_does_not_grow_with_tasks(self):
+        small = self.peak_memory(1000)
+        self.assertLess(self.peak_memory(4000), small * 1.5)
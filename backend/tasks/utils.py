@@ -0,0 +1,119 @@
+import base64
+import json
+import math
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+from django.db.models import F, Q
+
+# Orderings supported by keyset (cursor) pagination. Each maps to the
+# ORDER BY used for the page; the primary key is always the tie-breaker
+# so the ordering is total and stable across pages.
+CURSOR_ORDERINGS = {
+    "updated_at": ("-updated_at", "-id"),
+    "due_date": (F("due_date").asc(nulls_last=True), "id"),
+    # Search results, best match first (needs the `rank` annotation)
+    "relevance": ("-rank", "-id"),
+}
+
+# Task attribute holding the ordering value of each ordering
+CURSOR_VALUES = {"updated_at": "updated_at", "due_date": "due_date", "relevance": "rank"}
+
+def _parse_rank(value) -> float:
+    """A search rank from its JSON number"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"not a rank: {value!r}")
+    return float(value)
+
+# Read back each ordering's value from a cursor; they raise ValueError or
+# TypeError for anything the ordering's column can't be compared with
+CURSOR_PARSERS = {
+    "updated_at": datetime.fromisoformat,
+    "due_date": date.fromisoformat,
+    "relevance": _parse_rank,
+}
+
+# Orderings whose column may be NULL, so a null value is a position
+CURSOR_NULLABLE = {"due_date"}
+
+def encode_cursor(order_by: str, task) -> str:
+    """
+    Create an opaque cursor pointing just after the given task
+
+    Args:
+        order_by: Ordering the cursor belongs to (a CURSOR_ORDERINGS key)
+        task: Last task of the current page, or its row from .values()
+
+    Returns:
+        URL-safe cursor string
+    """
+    if isinstance(task, dict):
+        value, task_id = task[CURSOR_VALUES[order_by]], task["id"]
+    else:
+        value, task_id = getattr(task, CURSOR_VALUES[order_by]), task.id
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    payload = {
+        "o": order_by,
+        "v": value,
+        "id": task_id,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode a cursor created by encode_cursor
+
+    Args:
+        cursor: Cursor string from a previous page
+
+    Returns:
+        Dict with the ordering, last value and last id, or None if invalid,
+        including values the ordering's column can't be compared with
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        order_by = payload["o"]
+        if order_by not in CURSOR_ORDERINGS:
+            return None
+        value, task_id = payload["v"], payload["id"]
+        if isinstance(task_id, bool) or not isinstance(task_id, int):
+            return None
+        if value is None:
+            if order_by not in CURSOR_NULLABLE:
+                return None
+        else:
+            value = CURSOR_PARSERS[order_by](value)
+        return {"order_by": order_by, "value": value, "id": task_id}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+def cursor_filter(order_by: str, value: Any, last_id: int) -> Q:
+    """
+    Build the keyset predicate selecting rows after the cursor position
+
+    Args:
+        order_by: Ordering of the page (a CURSOR_ORDERINGS key)
+        value: Ordering value of the last row on the previous page
+        last_id: Primary key of the last row on the previous page
+
+    Returns:
+        Q object to filter the next page
+    """
+    if order_by == "updated_at":
+        # Descending: newest first
+        return Q(updated_at__lt=value) | Q(updated_at=value, id__lt=last_id)
+    
+    if order_by == "relevance":
+        # Descending: best match first
+        return Q(rank__lt=value) | Q(rank=value, id__lt=last_id)
+
+    # Ascending due date with tasks without a due date sorted last
+    if value is None:
+        return Q(due_date__isnull=True, id__gt=last_id)
+    return (
+        Q(due_date__gt=value) |
+        Q(due_date=value, id__gt=last_id) |
+        Q(due_date__isnull=True)
+    )
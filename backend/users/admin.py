@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
 from .models import User
+from .auth import token_cache
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -49,27 +50,36 @@ class CustomUserAdmin(UserAdmin):
     def activate_users(self, request, queryset):
         """Action to activate selected users"""
         queryset.update(is_active=True)
+        self.invalidate_cached_tokens(queryset)
         self.message_user(request, f"{queryset.count()} users were successfully activated.")
     activate_users.short_description = "Activate selected users"
     
     def deactivate_users(self, request, queryset):
         """Action to deactivate selected users"""
         queryset.update(is_active=False)
+        self.invalidate_cached_tokens(queryset)
         self.message_user(request, f"{queryset.count()} users were successfully deactivated.")
     deactivate_users.short_description = "Deactivate selected users"
     
     def set_as_admin(self, request, queryset):
         """Action to set selected users as admins"""
         queryset.update(role=User.ROLE_ADMIN)
+        self.invalidate_cached_tokens(queryset)
         self.message_user(request, f"{queryset.count()} users were set as administrators.")
     set_as_admin.short_description = "Set selected users as administrators"
     
     def set_as_standard(self, request, queryset):
         """Action to set selected users as standard users"""
         queryset.update(role=User.ROLE_STANDARD)
+        self.invalidate_cached_tokens(queryset)
         self.message_user(request, f"{queryset.count()} users were set as standard users.")
     set_as_standard.short_description = "Set selected users as standard users"
     
+    def invalidate_cached_tokens(self, queryset):
+        """Drop cached auth tokens of users changed by a bulk update"""
+        for user_id in queryset.values_list('id', flat=True):
+            token_cache.invalidate_user(user_id)
+    
     # Save method to ensure superusers have admin role
     def save_model(self, request, obj, form, change):
         """Ensure superusers have admin role"""
@@ -1,17 +1,19 @@
-from ninja import Router
-from django.contrib.auth import get_user_model, authenticate
+from django.contrib.auth import aauthenticate, get_user_model
 from django.shortcuts import get_object_or_404
 from .schemas import (
     UserRegistrationIn, UserLoginIn, TokenRefreshIn, UserUpdateIn,
     TokenOut, UserOut, MessageOut, ErrorOut
 )
 from .utils import create_token, decode_token
+from backend.profiling import ProfiledRouter
+from backend.querycount import query_budget
 from typing import Dict
 
 User = get_user_model()
-router = Router()
+router = ProfiledRouter()
 
 @router.post("/register", response={201: UserOut, 400: ErrorOut})
+@query_budget(3)
 def register(request, data: UserRegistrationIn):
     """Register a new user"""
     # Check if passwords match
@@ -38,15 +40,15 @@ def register(request, data: UserRegistrationIn):
     return 201, user
 
 @router.post("/login", response={200: TokenOut, 401: ErrorOut})
-def login(request, data: UserLoginIn):
-    """Login user and return tokens"""
-    # Find the user by email first
-    try:
-        user_obj = User.objects.get(email=data.email)
-        # Then authenticate with the username and password
-        user = authenticate(username=user_obj.username, password=data.password)
-    except User.DoesNotExist:
-        user = None
+@query_budget(2)
+async def login(request, data: UserLoginIn):
+    """
+    Login user and return tokens
+    
+    The user is looked up by email once, and the password is hashed in
+    the login thread pool so the worker keeps serving other requests.
+    """
+    user = await aauthenticate(request, email=data.email, password=data.password)
     
     if not user:
         return 401, {"error": "Invalid credentials"}
@@ -56,14 +58,16 @@ def login(request, data: UserLoginIn):
         user_id=user.id,
         username=user.username,
         role=user.role,
-        token_type="access"
+        token_type="access",
+        is_staff=user.is_staff
     )
     
     refresh_token = create_token(
         user_id=user.id,
         username=user.username,
         role=user.role,
-        token_type="refresh"
+        token_type="refresh",
+        is_staff=user.is_staff
     )
     
     return 200, {
@@ -80,6 +84,7 @@ def login(request, data: UserLoginIn):
 
 
 @router.post("/refresh", response={200: Dict, 401: ErrorOut})
+@query_budget(1)
 def refresh_token(request, data: TokenRefreshIn):
     """Refresh access token"""
     payload = decode_token(data.refresh)
@@ -97,15 +102,17 @@ def refresh_token(request, data: TokenRefreshIn):
         user_id=user.id,
         username=user.username,
         role=user.role,
-        token_type="access"
+        token_type="access",
+        is_staff=user.is_staff
     )
     
     return 200, {"access_token": access_token}
 
 @router.get("/me", response=UserOut, auth=None)  # We'll add auth later
-def get_user_profile(request):
+@query_budget(1)
+async def get_user_profile(request):
     """Get current user profile"""
     # This is a placeholder - we'll implement proper authentication later
     # For now, just return the first user
-    user = User.objects.first()
+    user = await User.objects.afirst()
     return user
\ No newline at end of file
@@ -1,15 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
 from ninja.security import HttpBearer
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from backend.profiling import profiled
 from .utils import decode_token
 
 User = get_user_model()
 
+# User fields kept for an authenticated principal
+PRINCIPAL_FIELDS = ('id', 'username', 'role', 'is_staff')
+
+class TokenCache:
+    """
+    Bounded, thread-safe cache of verified access tokens
+    
+    Maps a token to the principal fields of its user. Entries expire after
+    the configured TTL or when the token itself expires, whichever comes
+    first, and the least recently used entry is evicted when full.
+    """
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # token -> (expires_at, fields)
+        self._tokens_by_user = {}  # user id -> set of cached tokens
+        self._lock = threading.Lock()
+    
+    def get(self, token: str):
+        """Return the cached principal fields for a token, or None"""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, fields = entry
+            if expires_at <= time.monotonic():
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return fields
+    
+    def set(self, token: str, fields: dict, token_exp: float = None):
+        """
+        Cache principal fields for a verified token
+        
+        Args:
+            token: Verified access token
+            fields: Principal fields of the token's user
+            token_exp: Token expiry as a UNIX timestamp, if known
+        """
+        ttl = self.ttl
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (time.monotonic() + ttl, fields)
+            self._tokens_by_user.setdefault(fields['id'], set()).add(token)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+    
+    def invalidate_user(self, user_id: int):
+        """Drop every cached token of a user"""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+    
+    def clear(self):
+        """Drop every cached token"""
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+    
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry[1]['id']
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+
+token_cache = TokenCache(
+    max_size=getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60),
+)
+
+def get_principal(fields: dict):
+    """
+    Build a lightweight user instance from principal fields
+    
+    The instance is not loaded from the database; it only carries the
+    fields needed for permission checks and for use in queries.
+    """
+    user = User(**fields)
+    user._state.adding = False
+    user._state.db = 'default'
+    return user
+
+def verify_access_token(token):
+    """
+    Decode a JWT and check that it is an access token
+    
+    Returns:
+        Token payload, or None if the token is invalid
+    """
+    payload = decode_token(token)
+    if not payload or payload.get("type") != "access":
+        return None
+    return payload
+
+def claims_principal_fields(payload):
+    """Principal fields taken from token claims, for AUTH_CLAIMS_ONLY"""
+    return {
+        "id": payload.get("user_id"),
+        "username": payload.get("username"),
+        "role": payload.get("role"),
+        "is_staff": payload.get("is_staff", False),
+    }
+
+def active_users(payload):
+    """QuerySet of the token's user if they are still active"""
+    return User.objects.filter(id=payload.get("user_id"), is_active=True)
+
 class AuthBearer(HttpBearer):
     """
     Authentication class for Django Ninja
     Validates JWT tokens in the Authorization header
+    
+    Verified tokens are cached in-process (see TokenCache), so repeated
+    requests with the same token skip JWT decoding and the user lookup.
+    With AUTH_CLAIMS_ONLY the principal is built from the token claims and
+    the database is never queried.
     """
     
+    @profiled('auth')
     def authenticate(self, request, token):
         """
         Authenticate the request using the JWT token
@@ -21,13 +156,52 @@ class AuthBearer(HttpBearer):
         Returns:
             User object if authentication successful, None otherwise
         """
-        payload = decode_token(token)
+        fields = token_cache.get(token)
+        if fields is not None:
+            return get_principal(fields)
+        
+        payload = verify_access_token(token)
+        if payload is None:
+            return None
+        
+        if getattr(settings, 'AUTH_CLAIMS_ONLY', False):
+            fields = claims_principal_fields(payload)
+        else:
+            fields = active_users(payload).values(*PRINCIPAL_FIELDS).first()
+            if fields is None:
+                return None
+        
+        token_cache.set(token, fields, token_exp=payload.get("exp"))
+        return get_principal(fields)
+
+class AsyncAuthBearer(AuthBearer):
+    """
+    AuthBearer for async API handlers
+    
+    Django Ninja awaits the authentication of async operations, so the
+    user lookup uses the async ORM instead of blocking the event loop.
+    Only use it on async handlers; sync handlers need AuthBearer.
+    """
+    
+    is_async = True
+    
+    @profiled('auth')
+    async def authenticate(self, request, token):
+        """Async version of AuthBearer.authenticate"""
+        fields = token_cache.get(token)
+        if fields is not None:
+            return get_principal(fields)
+        
+        payload = verify_access_token(token)
+        if payload is None:
+            return None
         
-        if payload and payload.get("type") == "access":
-            user_id = payload.get("user_id")
-            try:
-                return User.objects.get(id=user_id)
-            except User.DoesNotExist:
-                pass
+        if getattr(settings, 'AUTH_CLAIMS_ONLY', False):
+            fields = claims_principal_fields(payload)
+        else:
+            fields = await active_users(payload).values(*PRINCIPAL_FIELDS).afirst()
+            if fields is None:
+                return None
         
-        return None
\ No newline at end of file
+        token_cache.set(token, fields, token_exp=payload.get("exp"))
+        return get_principal(fields)
@@ -0,0 +1,63 @@
+"""
+Email authentication backend
+
+Users log in with their email address. The user is found with a single
+lookup on the unique email index, and the password is checked against the
+loaded row, so a login runs one query (two when the stored hash is
+upgraded).
+
+Async logins hash passwords in a bounded thread pool (LOGIN_HASH_WORKERS)
+instead of the event loop or Django's single sync thread. PBKDF2 releases
+the GIL, so hashes run in parallel up to the pool size, and further logins
+wait for a free worker instead of piling up in request threads.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+
+User = get_user_model()
+
+hash_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'LOGIN_HASH_WORKERS', None) or os.cpu_count() or 1,
+    thread_name_prefix='password-hash',
+)
+
+def _needs_rehash(encoded: str) -> bool:
+    """Whether a stored hash should be upgraded to the current default hasher"""
+    hasher = get_hasher()
+    return identify_hasher(encoded).algorithm != hasher.algorithm or hasher.must_update(encoded)
+
+class EmailBackend(ModelBackend):
+    """Authenticate with email and password"""
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if not email or password is None:
+            return None
+        user = User._default_manager.filter(email=email).first()
+        if user is None:
+            # Hash anyway so unknown emails take as long as wrong passwords
+            make_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    async def aauthenticate(self, request, email=None, password=None, **kwargs):
+        if not email or password is None:
+            return None
+        loop = asyncio.get_running_loop()
+        user = await User._default_manager.filter(email=email).afirst()
+        if user is None:
+            await loop.run_in_executor(hash_executor, make_password, password)
+            return None
+        valid = await loop.run_in_executor(hash_executor, check_password, password, user.password)
+        if not (valid and self.user_can_authenticate(user)):
+            return None
+        if _needs_rehash(user.password):
+            user.password = await loop.run_in_executor(hash_executor, make_password, password)
+            await user.asave(update_fields=['password'])
+        return user
@@ -0,0 +1,65 @@
+import asyncio
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth import aauthenticate, authenticate, get_user_model
+from django.core.management.base import BaseCommand
+from users.backends import hash_executor
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    """Measure concurrent email logins through the sync and async paths"""
+    
+    help = 'Benchmark concurrent logins: sync authenticate() in threads vs async aauthenticate()'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200, help='Logins per path')
+        parser.add_argument('--concurrency', type=int, default=50, help='Logins in flight at once')
+    
+    def handle(self, *args, **options):
+        email = f"benchmark-{uuid.uuid4().hex}@example.com"
+        password = uuid.uuid4().hex
+        user = User.objects.create_user(username=email, email=email, password=password)
+        try:
+            self.stdout.write(f"Hash pool: {hash_executor._max_workers} threads")
+            self.report("sync, thread per login", self.run_sync(email, password, options))
+            self.report("async, hash pool", asyncio.run(self.run_async(email, password, options)))
+        finally:
+            user.delete()
+    
+    def run_sync(self, email, password, options):
+        """Blocking logins, one request thread each as under WSGI"""
+        def login(_):
+            started = time.perf_counter()
+            assert authenticate(email=email, password=password) is not None
+            return time.perf_counter() - started
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as threads:
+            latencies = list(threads.map(login, range(options['logins'])))
+        return time.perf_counter() - started, latencies
+    
+    async def run_async(self, email, password, options):
+        """Async logins on one event loop, as under ASGI"""
+        limit = asyncio.Semaphore(options['concurrency'])
+        
+        async def login():
+            async with limit:
+                started = time.perf_counter()
+                assert await aauthenticate(email=email, password=password) is not None
+                return time.perf_counter() - started
+        
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(login() for _ in range(options['logins'])))
+        return time.perf_counter() - started, latencies
+    
+    def report(self, name, result):
+        elapsed, latencies = result
+        latencies = sorted(latencies)
+        p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+        self.stdout.write(
+            f"{name:<24} {len(latencies) / elapsed:8.1f} logins/s  "
+            f"p50 {statistics.median(latencies) * 1000:7.1f}ms  p95 {p95 * 1000:7.1f}ms"
+        )
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.7 on 2026-10-16 23:40
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+# Duplicate emails listed in the error, at most
+SHOWN_DUPLICATES = 20
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """
+    Stop before adding the constraint if accounts share an email
+
+    Exact duplicates would make the constraint fail halfway with an
+    IntegrityError; ones differing only in case are reported too, since
+    they are the same mailbox. Which account keeps the address is for an
+    admin to decide, so nothing is changed here.
+    """
+    User = apps.get_model('users', 'User')
+    users = User.objects.using(schema_editor.connection.alias).exclude(email='')
+    duplicates = list(
+        users.values(address=Lower('email')).annotate(n=Count('id')).filter(n__gt=1)
+        .order_by('-n', 'address').values_list('address', flat=True)[:SHOWN_DUPLICATES + 1]
+    )
+    if not duplicates:
+        return
+    lines = [
+        f"  {address}: user ids "
+        + ", ".join(str(pk) for pk in users.filter(email__iexact=address).order_by('pk').values_list('pk', flat=True))
+        for address in duplicates[:SHOWN_DUPLICATES]
+    ]
+    if len(duplicates) > SHOWN_DUPLICATES:
+        lines.append("  ...")
+    raise RuntimeError(
+        "Emails must be unique before migration users.0002 can add its constraint, "
+        "but these are used by more than one account (ignoring case):\n"
+        + "\n".join(lines)
+        + "\nGive all but one account of each a different email, or clear it "
+        "(e.g. User.objects.filter(pk__in=[...]).update(email='')), then migrate again."
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(condition=models.Q(('email', ''), _negated=True), fields=('email',), name='unique_user_email'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Q
 
 class User(AbstractUser):
     """
@@ -34,10 +35,20 @@ class User(AbstractUser):
     )
     bio = models.TextField(blank=True, help_text='User biography')
     profile_image = models.URLField(blank=True, help_text='URL to profile image')
+    # Moves on every save; versions task lists showing the user's name
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        constraints = [
+            # Login looks users up by email; accounts without one are exempt
+            models.UniqueConstraint(
+                fields=['email'],
+                condition=~Q(email=''),
+                name='unique_user_email',
+            ),
+        ]
     
     @property
     def is_admin(self):
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from backend.responsecache import invalidate
+from .auth import token_cache
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_tokens(sender, instance, **kwargs):
+    """Drop cached tokens of a user whose account changed"""
+    token_cache.invalidate_user(instance.pk)
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_responses(sender, instance, using=None, **kwargs):
+    """Invalidate cached responses of a user whose account changed"""
+    invalidate(users=(instance.pk,), using=using)
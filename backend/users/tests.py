@@ -1,3 +1,52 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from backend.testing import ApiTestCase
+from .utils import create_token
 
-# Create your tests here.
+User = get_user_model()
+
+class AuthEndpointTests(ApiTestCase):
+    """Registration, login and token refresh within their query budgets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='alice', email='alice@example.com', password='correct horse'
+        )
+
+    def test_register(self):
+        response = self.api('post', '/auth/register', data={
+            'username': 'bob', 'email': 'bob@example.com',
+            'password': 'battery staple', 'password_confirm': 'battery staple',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.filter(username='bob').exists())
+
+    def test_register_rejects_taken_email(self):
+        response = self.api('post', '/auth/register', data={
+            'username': 'bob', 'email': 'alice@example.com',
+            'password': 'battery staple', 'password_confirm': 'battery staple',
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_login(self):
+        response = self.api('post', '/auth/login', data={
+            'email': 'alice@example.com', 'password': 'correct horse',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access_token', response.json())
+
+    def test_login_rejects_wrong_password(self):
+        response = self.api('post', '/auth/login', data={
+            'email': 'alice@example.com', 'password': 'wrong',
+        })
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_token(self):
+        refresh = create_token(self.user.id, self.user.username, self.user.role, token_type='refresh')
+        response = self.api('post', '/auth/refresh', data={'refresh': refresh})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access_token', response.json())
+
+    def test_get_user_profile(self):
+        response = self.api('get', '/auth/me', user=self.user)
+        self.assertEqual(response.status_code, 200)
@@ -3,7 +3,7 @@ from datetime import datetime, timedelta
 from django.conf import settings
 from typing import Dict, Any
 
-def create_token(user_id: int, username: str, role: str, token_type: str = "access", expires_delta: timedelta = None) -> str:
+def create_token(user_id: int, username: str, role: str, token_type: str = "access", expires_delta: timedelta = None, is_staff: bool = False) -> str:
     """
     Create a JWT token for the user
     
@@ -13,6 +13,7 @@ def create_token(user_id: int, username: str, role: str, token_type: str = "acce
         role: User role
         token_type: Token type (access or refresh)
         expires_delta: Token expiration time
+        is_staff: Whether the user is a staff member
         
     Returns:
         JWT token string
@@ -29,6 +30,7 @@ def create_token(user_id: int, username: str, role: str, token_type: str = "acce
         "user_id": user_id,
         "username": username,
         "role": role,
+        "is_staff": is_staff,
         "type": token_type,
         "exp": datetime.utcnow() + expires_delta,
         "iat": datetime.utcnow()